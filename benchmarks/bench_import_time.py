@@ -0,0 +1,51 @@
+"""
+Measures how long the command line and the package take to start, each in a fresh interpreter.
+Run from the repository root: python benchmarks/bench_import_time.py
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+
+_COMMANDS = {
+    "python (reference)": ["-c", "pass"],
+    "import pkg_resources (former version lookup)": ["-c", "import pkg_resources"],
+    "import replicreator": ["-c", "import replicreator"],
+    "replicreator.__version__": ["-c", "import replicreator; replicreator.__version__"],
+    "import replicreator.app": ["-c", "import replicreator.app"],
+    "replicreator --help": ["-m", "replicreator.cli", "--help"],
+    "replicreator --version": ["-m", "replicreator.cli", "--version"],
+}
+
+
+def measure(arguments, repeat):
+    """
+    :param arguments: arguments of the Python interpreter.
+    :param repeat:
+    :return: the best duration of running the interpreter with given arguments, in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start_time)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for name, arguments in _COMMANDS.items():
+        try:
+            duration = measure(arguments, args.repeat)
+        except subprocess.CalledProcessError:
+            print(f"{name}: failed")
+            continue
+        print(f"{name}: {duration * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Compares the inline stage directions tokenizer with the former slicing implementation on long lines.
+Run from the repository root: python benchmarks/bench_inline_stage_directions.py
+"""
+from replicreator.util.inline_stage_directions import remove_inline_stage_directions
+
+import argparse
+import timeit
+
+
+def remove_inline_stage_directions_by_slicing(line):
+    """
+    Former implementation, slicing the rest of the line after each span. It never ends on unclosed parentheses, which
+    the benchmarked lines do not contain.
+    """
+    clean_line_chunks = []
+    while line:
+        if line[0] == "(":
+            end = line.find(")")
+            line = line[end + 1:]
+        else:
+            begin = line.find("(")
+            if begin == -1:
+                begin = len(line)
+            clean_line_chunks.append(line[:begin])
+            line = line[begin:]
+    return "".join(clean_line_chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n_directions in [10, 100, 1000, 10000]:
+        line = "Miaou miaa, miaaou ! (en s'étirant) " * n_directions
+        if remove_inline_stage_directions(line) != remove_inline_stage_directions_by_slicing(line):
+            raise RuntimeError("Implementations differ.")
+        durations = [
+            min(timeit.repeat(lambda: function(line), number=10, repeat=args.repeat)) / 10
+            for function in [remove_inline_stage_directions_by_slicing, remove_inline_stage_directions]]
+        print(f"{len(line)} chars, {n_directions} directions: slicing {durations[0] * 1e6:.0f} us, "
+              f"single scan {durations[1] * 1e6:.0f} us ({durations[0] / durations[1]:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares loading a parameters file listing many scenes and characters, uncached, cached on disk as by another process,
+and cached in memory, with the former loading, which used the pure Python yaml loader and built a new validator with
+its schema on every call.
+Run from the repository root: python benchmarks/bench_parameters_loading.py
+"""
+from replicreator.app import _parameters_schema, load_parameters_file
+from replicreator.util.parameters_loading import CustomValidator, _validated_parameters_cache, get_cache_folder_path
+
+from synthetic_play import write_play
+
+import argparse
+import os
+import shutil
+import tempfile
+import timeit
+
+import yaml
+
+
+def load_parameters_yaml_without_cache(parameters_file_path, schema):
+    """
+    Former implementation.
+    """
+    with open(parameters_file_path, 'r', encoding="utf8") as f:
+        raw_parameters = yaml.load(f.read(), Loader=yaml.SafeLoader)
+    validator = CustomValidator(
+        base_path=os.path.dirname(parameters_file_path), schema={'root': schema}, require_all=True)
+    if not validator.validate({'root': raw_parameters}):
+        raise RuntimeError(f"Bad parameters: {validator.errors}")
+    return validator.document["root"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenes", type=int, default=300)
+    parser.add_argument("--characters", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder_path:
+        # The persistent cache is written in the temporary folder rather than in the user cache folder.
+        os.environ["XDG_CACHE_HOME"] = folder_path
+        parameters_file_path = str(write_play(
+            folder_path, n_scenes=args.scenes, n_characters=args.characters, n_blocks_per_scene=1))
+
+        if load_parameters_file(parameters_file_path) != load_parameters_yaml_without_cache(
+                parameters_file_path, _parameters_schema):
+            raise RuntimeError("Implementations differ.")
+
+        def load_uncached():
+            _validated_parameters_cache.clear()
+            shutil.rmtree(get_cache_folder_path(), ignore_errors=True)
+            load_parameters_file(parameters_file_path)
+
+        def load_cached_on_disk():
+            _validated_parameters_cache.clear()
+            load_parameters_file(parameters_file_path)
+
+        durations = {
+            "former": lambda: load_parameters_yaml_without_cache(parameters_file_path, _parameters_schema),
+            "uncached": load_uncached,
+            "cached on disk": load_cached_on_disk,
+            "cached in memory": lambda: load_parameters_file(parameters_file_path),
+        }
+        print(f"Parameters file with {args.scenes} scenes and {args.characters} characters:")
+        for name, function in durations.items():
+            duration = min(timeit.repeat(function, number=1, repeat=args.repeat))
+            print(f"{name}: {duration * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
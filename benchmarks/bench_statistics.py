@@ -0,0 +1,75 @@
+"""
+Compares the statistics engine with the former character by character implementation on a large synthetic play.
+Run from the repository root: python benchmarks/bench_statistics.py
+"""
+from replicreator.app import compute_statistics, create_label2main, parse_transcription
+from replicreator.util.inline_stage_directions import remove_inline_stage_directions
+
+from synthetic_play import generate_play
+
+import argparse
+import timeit
+
+
+def compute_statistics_per_character(transcriptions, main_character_labels):
+    """
+    Former implementation, cleaning lines one character at a time and storing nested dicts.
+    """
+    statistics = []
+    for transcription in transcriptions:
+        scene_statistics = {char: {"lines": 0, "words": 0, "alphanum_chars": 0} for char in main_character_labels}
+        for block in transcription["blocks"]:
+            for line in block['lines']:
+                line = remove_inline_stage_directions(line)
+                clean_line = "".join([c if c.isalnum() else " " for c in line])
+                n_words = len(clean_line.split())
+                n_alphanum_chars = sum(c.isalnum() for c in clean_line)
+                for main_character in block["main_characters"]:
+                    if main_character is not None:
+                        char_stats = scene_statistics[main_character]
+                        char_stats["lines"] += 1
+                        char_stats["words"] += n_words
+                        char_stats["alphanum_chars"] += n_alphanum_chars
+        statistics.append(scene_statistics)
+    return statistics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenes", type=int, default=40)
+    parser.add_argument("--blocks", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    parameters, scene_texts = generate_play(n_scenes=args.scenes, n_blocks_per_scene=args.blocks)
+    main_character_labels = [character["labels"][0] for character in parameters["characters"]]
+    label2main = create_label2main(parameters)
+    stage_directions_labels = set(parameters["stage_directions"]["labels"])
+    transcriptions = [parse_transcription(text.splitlines(), label2main, stage_directions_labels)
+                      for text in scene_texts]
+    n_lines = sum(len(block["lines"]) for transcription in transcriptions for block in transcription["blocks"])
+    print(f"Synthetic play: {args.scenes} scenes, {n_lines} lines.")
+
+    statistics = compute_statistics(parameters, transcriptions, main_character_labels)
+    reference_statistics = compute_statistics_per_character(transcriptions, main_character_labels)
+    for scene_index, scene_statistics in enumerate(reference_statistics):
+        for character, character_statistics in scene_statistics.items():
+            for metric, value in character_statistics.items():
+                if statistics.get(scene_index, character, metric) != value:
+                    raise RuntimeError(f"Statistics differ for {character} and {metric} in scene {scene_index}.")
+
+    durations = {
+        "per character (former)": min(timeit.repeat(
+            lambda: compute_statistics_per_character(transcriptions, main_character_labels),
+            number=1, repeat=args.repeat)),
+        "matrix": min(timeit.repeat(
+            lambda: compute_statistics(parameters, transcriptions, main_character_labels),
+            number=1, repeat=args.repeat)),
+    }
+    for name, duration in durations.items():
+        print(f"{name}: {duration * 1000:.1f} ms")
+    print(f"Speedup: {durations['per character (former)'] / durations['matrix']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares writing the web app page with a compiled template streamed to the file, with the former chain of str.replace
+calls building the whole page in memory, on a raw transcriptions web app of a synthetic play.
+Run from the repository root: python benchmarks/bench_web_app_rendering.py
+"""
+from replicreator.app import load_web_app_resources, load_web_app_templates
+
+from synthetic_play import generate_play
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def write_by_replacing(file_path, template_app, values):
+    """
+    Former implementation: each placeholder is replaced in the whole page, then the page is encoded and written.
+    """
+    app_script = template_app.replace("##MAIN_SCRIPT##", values["MAIN_SCRIPT"])
+    for name in ["MAIN_SCRIPT_TYPE", "ONLOAD", "TRANSCRIPTIONS_DATA", "PLAY_NAME", "VERSION"]:
+        app_script = app_script.replace(f"##{name}##", values[name])
+    app_script = app_script.replace("<!--##BRYTHON_SCRIPT##-->", "".join(values["BRYTHON_SCRIPT"]))
+    app_script = app_script.replace("<!--##SERVICE_WORKER_REGISTRATION##-->", values["SERVICE_WORKER_REGISTRATION"])
+    len(app_script.encode("utf8"))  # size budget check
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write(app_script)
+
+
+def write_by_streaming(file_path, template, values):
+    with open(file_path, "wb") as f:
+        template.write(f, values)
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    function(*args)
+    duration = time.perf_counter() - start_time
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duration, peak_memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    resources = load_web_app_resources()
+    template = load_web_app_templates(False)["template_app"]
+    for n_scenes in [1, 10, 100]:
+        _, scene_texts = generate_play(n_scenes=n_scenes)
+        main_script = "".join(f'"""\\\n{text}""",\n' for text in scene_texts)
+        values = {
+            "PLAY_NAME": "Synthetic play",
+            "VERSION": "1.0",
+            "BRYTHON_SCRIPT": ['<script type="text/javascript">\n', resources["brython_script"], '\n    </script>'],
+            "ONLOAD": "brython()",
+            "TRANSCRIPTIONS_DATA": "null",
+            "MAIN_SCRIPT_TYPE": "text/python",
+            "MAIN_SCRIPT": main_script,
+            "SERVICE_WORKER_REGISTRATION": "",
+        }
+        with tempfile.TemporaryDirectory() as folder_path:
+            replaced_file_path = os.path.join(folder_path, "replaced.html")
+            streamed_file_path = os.path.join(folder_path, "streamed.html")
+            results = []
+            implementations = [(write_by_replacing, replaced_file_path, resources["template_app"]),
+                               (write_by_streaming, streamed_file_path, template)]
+            for function, file_path, template_argument in implementations:
+                measures = [measure(function, file_path, template_argument, values) for _ in range(args.repeat)]
+                results.append((min(m[0] for m in measures), min(m[1] for m in measures)))
+            with open(replaced_file_path, "rb") as f1, open(streamed_file_path, "rb") as f2:
+                if f1.read() != f2.read():
+                    raise RuntimeError("Implementations differ.")
+            size = os.path.getsize(streamed_file_path)
+
+        (replace_duration, replace_peak), (stream_duration, stream_peak) = results
+        print(f"{n_scenes} scenes, {size / 1e6:.1f} MB page: "
+              f"replace {replace_duration * 1000:.1f} ms, peak {replace_peak / 1e6:.1f} MB; "
+              f"stream {stream_duration * 1000:.1f} ms, peak {stream_peak / 1e6:.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Times each stage of a build of a synthetic play and measures its peak memory.
+Results can be saved as JSON, and compared with previously saved results:
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json
+"""
+from replicreator.app import (
+    check_parameters, check_transcriptions, compute_statistics, create_label2main, embeds_transcription_texts,
+    generate_web_app, load_parameters_file, load_transcription, save_statistics)
+
+from synthetic_play import write_play
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+
+def measure(function, repeat):
+    """
+    :param function: function without arguments.
+    :param repeat: number of timed calls.
+    :return: a dict with the best duration of the calls under "seconds", and the peak of memory allocated during a
+    first, untimed, call under "peak_memory_bytes".
+    """
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": min(timeit.repeat(function, number=1, repeat=repeat)),
+        "peak_memory_bytes": peak_memory
+    }
+
+
+def run_benchmarks(parameters_file_path, repeat):
+    """
+    :param parameters_file_path: parameters file of the play to build.
+    :param repeat: number of timed runs of each stage.
+    :return: dict giving the measures of each stage, see `measure`.
+    """
+    parameters = load_parameters_file(parameters_file_path)
+    check_parameters(parameters)
+    main_character_labels = [character["labels"][0] for character in parameters["characters"]]
+    label2main = create_label2main(parameters)
+    stage_directions_labels = set(parameters["stage_directions"]["labels"])
+    keep_texts = embeds_transcription_texts(parameters)
+
+    def load_transcriptions():
+        return [load_transcription(scene["file_path"], label2main, stage_directions_labels, keep_texts)
+                for scene in parameters["scenes"]]
+
+    transcriptions = load_transcriptions()
+    statistics = compute_statistics(parameters, transcriptions, main_character_labels)
+    stages = {
+        "load_transcriptions": load_transcriptions,
+        "check_transcriptions": lambda: check_transcriptions(parameters, transcriptions),
+        "compute_statistics": lambda: compute_statistics(parameters, transcriptions, main_character_labels),
+        "save_statistics": lambda: save_statistics(parameters, statistics),
+        "generate_web_app": lambda: generate_web_app(parameters, transcriptions),
+    }
+    return {name: measure(function, repeat) for name, function in stages.items()}
+
+
+def compare_results(results, baseline, tolerance):
+    """
+    Prints the measures of each stage next to the baseline ones.
+    :param results: benchmark results, see `main`.
+    :param baseline: benchmark results to compare with.
+    :param tolerance: relative increase of a measure above which it is reported as a regression.
+    :return: list of regression descriptions.
+    """
+    if results["play"] != baseline["play"]:
+        raise RuntimeError(f"Results of different plays cannot be compared: {results['play']} vs {baseline['play']}.")
+    regressions = []
+    for stage, measures in results["stages"].items():
+        baseline_measures = baseline["stages"].get(stage)
+        if baseline_measures is None:
+            print(f"{stage}: not in baseline")
+            continue
+        descriptions = []
+        for measure_name, value in measures.items():
+            ratio = value / baseline_measures[measure_name] if baseline_measures[measure_name] else float("inf")
+            descriptions.append(f"{measure_name} {value:.4g} ({ratio:.2f}x baseline)")
+            if ratio > 1 + tolerance:
+                regressions.append(f"{stage} {measure_name} is {ratio:.2f}x baseline")
+        print(f"{stage}: {', '.join(descriptions)}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=20)
+    parser.add_argument("--characters", type=int, default=12)
+    parser.add_argument("--blocks", type=int, default=400, help="number of blocks per scene.")
+    parser.add_argument("--multi-character-ratio", type=float, default=0.2,
+                        help="probability that a block is said by two characters at once.")
+    parser.add_argument("--inline-direction-ratio", type=float, default=0.3,
+                        help="probability that a line contains an inline stage direction.")
+    parser.add_argument("--line-words", type=int, nargs=2, default=[2, 15], metavar=("MIN", "MAX"),
+                        help="number of words of a line.")
+    parser.add_argument("--transcriptions-format", choices=["raw", "parsed"], default="raw")
+    parser.add_argument("--mode", choices=["single_file", "split"], default="single_file")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs of each stage.")
+    parser.add_argument("--output", help="file to save results to, as JSON.")
+    parser.add_argument("--baseline", help="JSON results to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative increase of a measure over the baseline reported as a regression.")
+    args = parser.parse_args(argv)
+
+    play = {
+        "n_scenes": args.scenes,
+        "n_characters": args.characters,
+        "n_blocks_per_scene": args.blocks,
+        "multi_character_ratio": args.multi_character_ratio,
+        "inline_direction_ratio": args.inline_direction_ratio,
+        "line_words": args.line_words,
+    }
+    web_app_parameters = {"transcriptions_format": args.transcriptions_format, "mode": args.mode}
+    with tempfile.TemporaryDirectory() as folder_path:
+        parameters_file_path = write_play(folder_path, web_app_parameters=web_app_parameters, **play)
+        stages = run_benchmarks(parameters_file_path, args.repeat)
+    results = {
+        "play": dict(play, web_app=web_app_parameters),
+        "python": platform.python_version(),
+        "stages": stages,
+    }
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline is None:
+        for stage, measures in stages.items():
+            print(f"{stage}: {measures['seconds'] * 1000:.1f} ms, "
+                  f"peak memory {measures['peak_memory_bytes'] / 1e6:.1f} MB")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf8") as f:
+        baseline = json.load(f)
+    regressions = compare_results(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
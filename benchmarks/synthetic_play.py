@@ -0,0 +1,91 @@
+from pathlib import Path
+import random
+
+import yaml
+
+
+_WORDS = [
+    "miaou", "rrrr", "le", "chat", "dort", "sur", "la", "fenêtre", "œil", "souris", "l'appartement", "vide",
+    "doucement", "Quoi", "?", "!", "...", "42", "mgnmgn", "été", "ça", "-", "jour", "nuit"]
+
+
+def generate_play(n_scenes=20, n_characters=12, n_blocks_per_scene=400, multi_character_ratio=0.2,
+                  inline_direction_ratio=0.3, line_words=(2, 15), seed=0):
+    """
+    Generates a synthetic play, as big as needed, for benchmarks.
+    Blocks mix characters, several characters speaking together, aliases, stage directions and inline stage directions.
+    :param n_scenes:
+    :param n_characters:
+    :param n_blocks_per_scene:
+    :param multi_character_ratio: probability that a block is said by two characters at once.
+    :param inline_direction_ratio: probability that a line contains an inline stage direction.
+    :param line_words: pair (min, max) of the number of words of a line.
+    :param seed: seed of the random generator, so that a given play is always the same.
+    :return: a pair (parameters, scene texts), parameters being the "stage_directions", "characters" and "scenes"
+    parameters of the play, without file paths.
+    """
+    rng = random.Random(seed)
+    stage_directions = {"labels": ["Didascalie", "DIDASCALIE"]}
+    characters = [{"labels": [f"Character{i}", f"C{i}"]} for i in range(n_characters)]
+
+    def sentence(n_words):
+        return " ".join(rng.choice(_WORDS) for _ in range(n_words))
+
+    scene_texts = []
+    for _ in range(n_scenes):
+        scene_lines = ["# Synthetic scene", ""]
+        for _ in range(n_blocks_per_scene):
+            if rng.random() < 0.1:
+                scene_lines.append(rng.choice(stage_directions["labels"]))
+                scene_lines.append(sentence(rng.randint(*line_words)))
+            else:
+                n_speakers = 2 if n_characters > 1 and rng.random() < multi_character_ratio else 1
+                speakers = rng.sample(characters, n_speakers)
+                scene_lines.append(", ".join(rng.choice(speaker["labels"]) for speaker in speakers))
+                for _ in range(rng.randint(1, 4)):
+                    line = sentence(rng.randint(*line_words))
+                    if rng.random() < inline_direction_ratio:
+                        line = f"{line} ({sentence(rng.randint(1, 4))}) {sentence(rng.randint(1, 6))}"
+                    scene_lines.append(line)
+            scene_lines.append("")
+        scene_texts.append("\n".join(scene_lines))
+
+    parameters = {
+        "stage_directions": stage_directions,
+        "characters": characters,
+        "scenes": [{"menu_name": f"Scene {i}"} for i in range(n_scenes)]
+    }
+    return parameters, scene_texts
+
+
+def write_play(folder_path, web_app_parameters=None, **kwargs):
+    """
+    Writes a synthetic play, see `generate_play`, with a parameters file building it into the same folder.
+    :param folder_path: existing folder.
+    :param web_app_parameters: dict of extra "output.web_app" parameters.
+    :param kwargs: see `generate_play`.
+    :return: path of the parameters file.
+    """
+    folder_path = Path(folder_path)
+    parameters, scene_texts = generate_play(**kwargs)
+    for i, (scene, scene_text) in enumerate(zip(parameters["scenes"], scene_texts)):
+        scene["file_path"] = f"scene_{i}.txt"
+        with open(folder_path / scene["file_path"], "w", encoding="utf8") as f:
+            f.write(scene_text)
+    parameters.update({
+        "play_name": "Synthetic play",
+        "version": "benchmark",
+        "output": {
+            "web_app": dict({"file_path": "index.html"}, **(web_app_parameters or {})),
+            "statistics": {
+                "base_file_path": "statistics",
+                "metrics": {"lines": True, "words": True, "alphanum_chars": True},
+                "compute_total_per_scene": True,
+                "compute_total_per_character": True,
+            }
+        }
+    })
+    parameters_file_path = folder_path / "replicreator_parameters.yaml"
+    with open(parameters_file_path, "w", encoding="utf8") as f:
+        yaml.safe_dump(parameters, f, allow_unicode=True, sort_keys=False)
+    return parameters_file_path
@@ -0,0 +1,28 @@
+// Translates the Python script read from standard input to Javascript with Brython, outside of any browser.
+// Usage: node brython_compiler.js path/to/brython.js < script.py > script.js
+// The output is the body of the function Brython builds to execute a "__main__" script.
+
+const fs = require("fs");
+
+// Brython expects a few browser globals while loading, even though it does not use them to compile.
+global.self = global;
+global.window = global;
+global.navigator = {userLanguage: "", language: ""};
+global.document = {
+    getElementsByTagName: () => [{src: "file:///brython.js"}],
+    querySelectorAll: () => [],
+    location: {href: ""}
+};
+
+eval(fs.readFileSync(process.argv[2], "utf8"));
+brython({debug: 1});
+
+const src = fs.readFileSync(0, "utf8");
+try {
+    const js = __BRYTHON__.py2js(src, "__main__", "__main__").to_js();
+    process.stdout.write(js);
+} catch (err) {
+    const message = err.__class__ === undefined ? String(err) : __BRYTHON__.class_name(err) + ": " + err.args;
+    process.stderr.write(message + "\n");
+    process.exit(1);
+}
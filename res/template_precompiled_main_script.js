@@ -0,0 +1,15 @@
+function run_precompiled_main_script() {
+    // Brython is initialized without looking for Python scripts, then the main script translated to Javascript at
+    // build time is executed the way Brython executes the scripts it translates itself.
+    brython({ids: []});
+    var $B = __BRYTHON__,
+        module = $B.module.$factory("__main__");
+    $B.imported["__main__"] = module;
+    try {
+        (function($locals___main__) {
+##PRECOMPILED_PYTHON_MAIN_SCRIPT##
+        })(module);
+    } catch (err) {
+        $B.handle_error(err);
+    }
+}
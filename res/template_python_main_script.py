@@ -1,4 +1,4 @@
-from browser import document, html
+from browser import document, html, window
 
 
 parameters = (
@@ -18,28 +18,21 @@ for character in parameters["characters"]:
 
 n_scenes = len(parameters["scenes"])
 
+# Indexes of the scenes in which each character speaks, computed when the web app was built.
+character_scenes = {character: set(scene_ids) for character, scene_ids in parameters["character_scenes"].items()}
+
 raw_transcriptions = [
 ##RAW_TRANSCRIPTIONS##
 ]
 
+# Transcriptions already parsed when the web app was built, or None if raw transcriptions must be parsed.
+transcriptions_data = window.JSON.parse(document["transcriptions_data"].text)
 
-def deepcopy(e):
-    if isinstance(e, list):
-        return [deepcopy(a) for a in e]
-    elif isinstance(e, dict):
-        return {deepcopy(k): deepcopy(v) for k, v in e.items()}
-    else:
-        return e
-
+# When the web app is split, folder from which transcriptions are fetched, scene by scene.
+data_folder = parameters.get("data_folder")
 
-# inspired from https://stackoverflow.com/questions/3062746/special-simple-random-number-generator
-seed = 0
 
-
-def randint(n):
-    global seed
-    seed = (1103515245 * seed + 12345) % 2**31
-    return seed % n
+##LINE_SCHEDULER##
 
 
 # Observer pattern implementation adapted from
@@ -185,6 +178,8 @@ class SelectionScreen:
         self.character_observable = Observable(None)
         self.scene_observable = Observable(None)
         self.start_observable = Observable(False)
+        self.character_buttons = {}
+        self.scene_buttons = {}
 
         self.html_root = self.create_root()
 
@@ -220,26 +215,40 @@ class SelectionScreen:
                 def button_action(event):
                     self.character_observable.value = character
                     self.scene_observable.value = None
-                    # print(self.character_observable.value)
                 return button_action
 
             button.bind("click", get_button_action(character))
-
-            def get_character_callback(button, character):
-                def callback(observable):
-                    if character == observable.value:
-                        if "char_button_selected" not in button.classList:
-                            button.classList.add("char_button_selected")
-                    else:
-                        if "char_button_selected" in button.classList:
-                            button.classList.remove("char_button_selected")
-                return callback
-
-            self.character_observable.subscribe(get_character_callback(button, character))
+            self.character_buttons[character] = button
 
             character_selection_panel <= html.DIV(button)
+
+        self.character_observable.subscribe(self.character_callback)
         return character_selection_panel
 
+    def character_callback(self, observable):
+        """
+        Selects the button of the new character, and only enables or disables the scene buttons whose state changes.
+        :param observable:
+        :return:
+        """
+        if observable.value == observable.old_value:
+            return
+        if observable.old_value is not None:
+            self.character_buttons[observable.old_value].classList.remove("char_button_selected")
+        if observable.value is not None:
+            self.character_buttons[observable.value].classList.add("char_button_selected")
+
+        old_scene_ids = character_scenes.get(observable.old_value, set())
+        new_scene_ids = character_scenes.get(observable.value, set())
+        for scene_id in old_scene_ids.symmetric_difference(new_scene_ids):
+            button = self.scene_buttons.get(scene_id)
+            if button is None:
+                continue
+            if scene_id in new_scene_ids:
+                del button.attrs["disabled"]
+            else:
+                button.attrs["disabled"] = None
+
     def create_scene_selection_panel(self):
         scene_selection_panel = html.DIV()
         for i, scene in enumerate(parameters["scenes"]):
@@ -247,6 +256,8 @@ class SelectionScreen:
                 scene_selection_panel <= html.DIV(f"({scene['menu_name']} manquante)", Class="missing_scene")
             else:
                 button = html.BUTTON(f"{scene['menu_name']}", Class="scene_button")
+                # Scenes are enabled when a character speaking in them is selected.
+                button.attrs["disabled"] = None
 
                 def get_button_action(scene_id):
                     def button_action(event):
@@ -254,33 +265,21 @@ class SelectionScreen:
                     return button_action
 
                 button.bind("click", get_button_action(i))
-
-                def get_character_callback(button, scene_id):
-                    def callback(observable):
-                        if observable.value in self.transcriptions[scene_id]["characters"]:
-                            if "disabled" in button.attrs:
-                                del button.attrs["disabled"]
-                        else:
-                            button.attrs["disabled"] = None
-                    return callback
-
-                self.character_observable.subscribe(get_character_callback(button, i))
-
-                def get_scene_callback(button, scene_id):
-                    def callback(observable):
-                        if scene_id == observable.value:
-                            if "scene_button_selected" not in button.classList:
-                                button.classList.add("scene_button_selected")
-                        else:
-                            if "scene_button_selected" in button.classList:
-                                button.classList.remove("scene_button_selected")
-                    return callback
-
-                self.scene_observable.subscribe(get_scene_callback(button, i))
+                self.scene_buttons[i] = button
 
                 scene_selection_panel <= html.DIV(button)
+
+        self.scene_observable.subscribe(self.scene_callback)
         return scene_selection_panel
 
+    def scene_callback(self, observable):
+        if observable.value == observable.old_value:
+            return
+        if observable.old_value is not None:
+            self.scene_buttons[observable.old_value].classList.remove("scene_button_selected")
+        if observable.value is not None:
+            self.scene_buttons[observable.value].classList.add("scene_button_selected")
+
     def create_start_game_panel(self):
         start_game_panel = html.DIV()
 
@@ -309,37 +308,428 @@ class SelectionScreen:
 
 def format_line(raw_line):
     div = html.DIV()
-    while raw_line:
-        if raw_line[0] == "(":
-            end = raw_line.find(')')
-            if end == -1:
-                end = len(raw_line) - 1
-            div <= html.EM(raw_line[:end + 1])
-            raw_line = raw_line[end + 1:]
-        else:
-            begin = raw_line.find('(')
-            if begin == -1:
-                begin = len(raw_line)
-            div <= html.SPAN(raw_line[:begin])
-            raw_line = raw_line[begin:]
+    for text, is_stage_direction in split_inline_stage_directions(raw_line):
+        div <= (html.EM(text) if is_stage_direction else html.SPAN(text))
     return div
 
 
-def remove_inline_stage_directions(line):
-    clean_line_chunks = []
-    while line:
-        if line[0] == "(":
-            end = line.find(")")
-            if end == -1:
-                len(line) - 1
-            line = line[end + 1:]
+def create_line_node(bloc, line_index):
+    line_node = format_line(bloc["lines"][line_index])
+    if bloc["characters"][0] in stage_directions_labels:
+        line_node.classList.add("didascalie")
+    return line_node
+
+
+def create_bloc_header_nodes(bloc):
+    header_nodes = [html.BR()]
+    if bloc["characters"][0] not in stage_directions_labels:
+        header_nodes.append(html.DIV(format_line(bloc["characters_line"]), Class="character_in_text"))
+    return header_nodes
+
+
+##INLINE_STAGE_DIRECTIONS##
+
+
+def parse_raw_transcription(raw_transcription):
+    blocs = []
+    new_character = True
+    for file_line in raw_transcription.split("\n"):
+        file_line = file_line.strip()
+        if not file_line:
+            new_character = True
+        elif file_line[0] != "#":
+            if new_character:
+                line_characters = [
+                    line_character
+                    for w in remove_inline_stage_directions(file_line).split(",")
+                    if (line_character := w.strip()) != ""]
+                blocs.append({"characters": line_characters, "lines": [], "characters_line": file_line})
+                new_character = False
+            else:
+                blocs[-1]["lines"].append(file_line)
+
+    return {"blocs": blocs}
+
+
+def unpack_blocs(labels, blocs_data):
+    return [
+        {"characters": [labels[i] for i in character_indexes], "lines": lines, "characters_line": characters_line}
+        for character_indexes, characters_line, lines in blocs_data]
+
+
+def unpack_transcription(labels, blocs_data):
+    return {"blocs": unpack_blocs(labels, blocs_data)}
+
+
+def fetch_json(url, callback, error_callback):
+    """
+    Fetches JSON data, then calls the callback with it, or the error callback if the data cannot be fetched, for
+    instance without network.
+    :param url: string
+    :param callback: function (data) -> None
+    :param error_callback: function (message) -> None
+    :return:
+    """
+    def text_callback(text):
+        callback(window.JSON.parse(text))
+
+    def response_callback(response):
+        if response.ok:
+            response.text().then(text_callback, failure_callback)
+        else:
+            error_callback(f"{url} : erreur HTTP {response.status}")
+
+    def failure_callback(error):
+        error_callback(f"{url} : {error}")
+
+    window.fetch(url).then(response_callback, failure_callback)
+
+
+def load_transcriptions(callback, error_callback):
+    """
+    Loads transcriptions, then calls the callback with them.
+    When the web app is split, only the index of scenes is loaded: blocs of a scene are None until loaded with
+    `load_scene_blocs`.
+    :param callback: function (list of transcriptions) -> None
+    :param error_callback: function (message) -> None, called if the index of scenes cannot be fetched.
+    :return:
+    """
+    if data_folder is not None:
+        def index_callback(index):
+            labels, scenes_index = index
+            callback([
+                {"blocs": None, "labels": labels, "url": f"{data_folder}/scene_{scene_id}.json?v={scene_hash}"}
+                for scene_id, scene_hash in enumerate(scenes_index)])
+
+        fetch_json(f"{data_folder}/index.json", index_callback, error_callback)
+    elif transcriptions_data is None:
+        callback([parse_raw_transcription(raw_transcription) for raw_transcription in raw_transcriptions])
+    else:
+        labels, scenes_data = transcriptions_data
+        callback([unpack_transcription(labels, scene_data) for scene_data in scenes_data])
+
+
+def load_scene_blocs(transcription, callback, error_callback):
+    """
+    Makes sure blocs of a scene are loaded, then calls the callback.
+    Calls made while the scene is being fetched wait for the same fetch. If it fails, their error callbacks are called,
+    and the next call fetches the scene again.
+    :param transcription: transcription of the scene.
+    :param callback: function () -> None
+    :param error_callback: function (message) -> None
+    :return:
+    """
+    if transcription["blocs"] is not None:
+        callback()
+        return
+    if "pending_callbacks" in transcription:
+        transcription["pending_callbacks"].append((callback, error_callback))
+        return
+    transcription["pending_callbacks"] = [(callback, error_callback)]
+
+    def scene_callback(blocs_data):
+        transcription["blocs"] = unpack_blocs(transcription["labels"], blocs_data)
+        for pending_callback, _ in transcription.pop("pending_callbacks"):
+            pending_callback()
+
+    def scene_error_callback(message):
+        for _, pending_error_callback in transcription.pop("pending_callbacks"):
+            pending_error_callback(message)
+
+    fetch_json(transcription["url"], scene_callback, scene_error_callback)
+
+
+class ReadingView:
+    """
+    Text of a whole scene. Only its first lines are rendered when it is shown: the next ones are rendered by chunks,
+    when the end of the rendered text comes within a screen height of the viewport. Thus, opening a long scene is as
+    fast as opening a short one.
+    """
+
+    CHUNK_N_LINES = 100
+
+    def __init__(self, blocs):
+        self.blocs = blocs
+        self.next_bloc_index = 0
+        self.text = html.DIV()
+        self.end_marker = html.DIV()
+        self.root = html.DIV([self.text, self.end_marker])
+        self.observer = window.IntersectionObserver.new(self.observer_callback, {"rootMargin": "100% 0px"})
+
+    def start(self):
+        self.render_next_chunk()
+        if self.next_bloc_index < len(self.blocs):
+            self.observer.observe(self.end_marker)
+
+    def stop(self):
+        self.observer.disconnect()
+
+    def render_next_chunk(self):
+        """
+        Renders the next blocs, until at least CHUNK_N_LINES lines are rendered, in a fragment appended at once.
+        :return:
+        """
+        fragment = document.createDocumentFragment()
+        n_lines = 0
+        while self.next_bloc_index < len(self.blocs) and n_lines < self.CHUNK_N_LINES:
+            bloc = self.blocs[self.next_bloc_index]
+            fragment <= create_bloc_header_nodes(bloc)
+            for line_index in range(len(bloc["lines"])):
+                fragment <= create_line_node(bloc, line_index)
+            n_lines += len(bloc["lines"])
+            self.next_bloc_index += 1
+        self.text <= fragment
+
+    def observer_callback(self, entries, observer):
+        if not any(entry.isIntersecting for entry in entries):
+            return
+        self.observer.unobserve(self.end_marker)
+        self.render_next_chunk()
+        if self.next_bloc_index < len(self.blocs):
+            # Observing the marker again reports at once whether it is still near the viewport.
+            self.observer.observe(self.end_marker)
+
+
+class RehearsalView:
+    """
+    Panel showing a line to recite, with the lines preceding it, and the buttons of each step of its evaluation.
+    It is built once per scene and the node of each line is rendered the first time the line is shown. Then, each
+    prompt only reattaches nodes and toggles their classes.
+    """
+
+    BUTTON_CONTENTS = {
+        "question": ["Je me souviens de la suite et je l'ai récitée.", "Je ne me souviens pas de la suite 😔"],
+        "grading": ["J'ai tout bon 😁", "Presque 😊", "Pas bon 😓"],
+        "repeat": ["C'est fait."],
+    }
+
+    def __init__(self, blocs):
+        self.blocs = blocs
+        self.line_nodes = {}
+        self.bloc_header_nodes = {}
+        self.shown_line_node = None
+        self.callback = None
+
+        self.text = html.DIV()
+        self.repeat_message = html.DIV(
+            [html.HR(), html.DIV("Répéter les phrases en couleur jusqu'à les connaître par cœur.")],
+            Class="removed")
+        self.panel = html.DIV([self.text, self.repeat_message, html.HR()])
+        self.button_groups = {}
+        for step, button_contents in self.BUTTON_CONTENTS.items():
+            button_group = html.SPAN(Class="removed")
+            for button_index, button_content in enumerate(button_contents):
+                button = html.BUTTON(button_content)
+                button.bind("click", self.get_button_action(button_index))
+                button_group <= button
+            self.button_groups[step] = button_group
+            self.panel <= button_group
+
+    def get_button_action(self, button_index):
+        def button_action(event):
+            callback = self.callback
+            self.callback = None
+            if callback is not None:
+                callback(button_index)
+        return button_action
+
+    def get_line_node(self, bloc_index, line_index):
+        line_node = self.line_nodes.get((bloc_index, line_index))
+        if line_node is None:
+            line_node = create_line_node(self.blocs[bloc_index], line_index)
+            self.line_nodes[(bloc_index, line_index)] = line_node
+        return line_node
+
+    def get_bloc_header_nodes(self, bloc_index):
+        header_nodes = self.bloc_header_nodes.get(bloc_index)
+        if header_nodes is None:
+            header_nodes = create_bloc_header_nodes(self.blocs[bloc_index])
+            self.bloc_header_nodes[bloc_index] = header_nodes
+        return header_nodes
+
+    def show_lines(self, bloc_line, history_length):
+        """
+        Shows a hidden line, preceded by at most history_length - 1 lines, and hides the buttons.
+        :param bloc_line: (bloc index, line index) of the line.
+        :param history_length:
+        :return:
+        """
+        bloc_index, line_index = bloc_line
+        reversed_nodes = []
+        for back_count in range(history_length):
+            line_node = self.get_line_node(bloc_index, line_index)
+            for other_back_count in range(history_length):
+                line_node.classList.remove(f"bloc_line_back_{other_back_count}")
+            line_node.classList.remove("hidden")
+            line_node.classList.add(f"bloc_line_back_{back_count}")
+            reversed_nodes.append(line_node)
+            if line_index == 0 or back_count == history_length - 1:
+                reversed_nodes.extend(self.get_bloc_header_nodes(bloc_index)[::-1])
+            if line_index > 0:
+                line_index -= 1
+            else:
+                if bloc_index > 0:
+                    bloc_index -= 1
+                    line_index = len(self.blocs[bloc_index]["lines"]) - 1
+                else:
+                    break
+
+        self.shown_line_node = reversed_nodes[0]
+        self.shown_line_node.classList.add("hidden")
+        reversed_nodes.reverse()
+        self.text.clear()
+        self.text <= reversed_nodes
+        self.show_buttons(None, None)
+
+        if self.panel.parent is None:
+            document["main_div"].clear()
+            document["main_div"] <= self.panel
+
+    def reveal_line(self):
+        self.shown_line_node.classList.remove("hidden")
+
+    def show_buttons(self, step, callback):
+        """
+        :param step: "question", "grading", "repeat" or None to hide every button.
+        :param callback: function (int) -> None, called with the index of the clicked button.
+        :return:
+        """
+        self.callback = callback
+        for button_step, button_group in self.button_groups.items():
+            if button_step == step:
+                button_group.classList.remove("removed")
+            else:
+                button_group.classList.add("removed")
+        if step == "repeat":
+            self.repeat_message.classList.remove("removed")
         else:
-            begin = line.find("(")
-            if begin == -1:
-                begin = len(line)
-            clean_line_chunks.append(line[:begin])
-            line = line[begin:]
-    return "".join(clean_line_chunks)
+            self.repeat_message.classList.add("removed")
+
+
+class RehearsalCursor:
+    """
+    State of a rehearsal: which prompt of the sequence is being answered, and at which step.
+    In "base" and "final" modes, lines are asked in order and scored in line_scores, see `ScoreStore`. In "random"
+    mode, lines are chosen by the line scheduler. Every answer but those of the base mode is also counted in the total
+    scores. A single cursor is updated in place at each click, so that a session takes the same memory however many
+    prompts it has.
+    """
+
+    def __init__(self, mode, n_lines):
+        self.mode = mode
+        self.n_prompts = max(2 * n_lines - 1, 0) if mode == "random" else n_lines
+        self.n_prompted = 0
+        self.bloc_line_index = None
+        self.step = None
+        self.result = None
+        self.line_scores = None
+
+
+RESULTS = ["perfect", "almost", "ko"]
+
+
+def get_line_score(scores, index):
+    return scores[3 * index], scores[3 * index + 1], scores[3 * index + 2]
+
+
+def get_score_resume(scores):
+    return {result: sum(scores[result_index::3]) for result_index, result in enumerate(RESULTS)}
+
+
+def parse_counts(text):
+    """
+    :param text: comma separated counts, as saved by `ScoreStore.save`. Empty if there are none.
+    :return: list of counts. Raises ValueError if text is not made of non-negative integers.
+    """
+    if not text:
+        return []
+    counts = [int(count) for count in text.split(",")]
+    if any(count < 0 for count in counts):
+        raise ValueError(f"negative count in {text}")
+    return counts
+
+
+def get_lines_fingerprint(lines):
+    """
+    Cheap hash of lines, changing if any character of a line changes, or if lines are swapped.
+    Intermediate values stay far below 2**53, so that Brython computes them with Javascript numbers.
+    """
+    fingerprint = len(lines)
+    for line in lines:
+        for character in line:
+            fingerprint = (fingerprint * 33 + ord(character)) % 4294967296
+        fingerprint = (fingerprint * 33 + 10) % 4294967296
+    return f"{len(lines)}-{fingerprint}"
+
+
+class ScoreStore:
+    """
+    Scores of the lines of a character in a scene. Scores are flat lists of counts, with the (perfect, almost, ko)
+    counts of the line of index i at indexes 3 * i, 3 * i + 1 and 3 * i + 2.
+    Base and total scores are saved in the localStorage of the browser, so that the rehearsal of the scene can be
+    resumed after the page is reloaded. They are saved as a short string:
+    "<format version>;<fingerprint of the lines>;<base progress>;<base scores>;<total scores>", with comma separated
+    counts. Base scores are saved after each answer of the base mode, with the number of lines answered so far as base
+    progress. Total scores are only saved once the base mode is complete, and are empty before.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, scene_index, character, lines):
+        scene_name = parameters['scenes'][scene_index]['menu_name']
+        self.key = f"replicreator;{parameters['play_name']};{scene_name};{character}"
+        # Saved scores are dropped if the lines of the character changed.
+        self.fingerprint = get_lines_fingerprint(lines)
+        self.n_lines = len(lines)
+        self.base_progress = 0
+        self.base = None
+        self.total = None
+
+    def is_base_complete(self):
+        return self.base is not None and self.base_progress == self.n_lines
+
+    def new_scores(self):
+        return [0] * (3 * self.n_lines)
+
+    def load(self):
+        """
+        :return: True if base scores, complete or not, were loaded, False if none were saved for these lines.
+        """
+        try:
+            text = window.localStorage.getItem(self.key)
+        except Exception:
+            return False
+        if not text:
+            return False
+        fields = text.split(";")
+        if len(fields) != 5 or fields[0] != str(self.FORMAT_VERSION) or fields[1] != self.fingerprint:
+            return False
+        # Saved scores may have been truncated or edited: anything unexpected is handled as if none were saved.
+        try:
+            base_progress = int(fields[2])
+            base = parse_counts(fields[3])
+            total = parse_counts(fields[4]) if base_progress == self.n_lines else None
+        except ValueError:
+            return False
+        # Base progress is only saved after an answer, so it is 0 only when there are no lines.
+        if not 0 <= base_progress <= self.n_lines or (base_progress == 0 and self.n_lines > 0):
+            return False
+        if len(base) != 3 * self.n_lines or (total is not None and len(total) != 3 * self.n_lines):
+            return False
+        self.base_progress = base_progress
+        self.base = base
+        self.total = total
+        return True
+
+    def save(self):
+        total_text = "" if self.total is None else ",".join(str(count) for count in self.total)
+        text = ";".join([str(self.FORMAT_VERSION), self.fingerprint, str(self.base_progress),
+                         ",".join(str(count) for count in self.base), total_text])
+        try:
+            window.localStorage.setItem(self.key, text)
+        except Exception:
+            # Storage may be full or disabled. Scores are still kept for the current session.
+            pass
 
 
 class App:
@@ -352,38 +742,15 @@ class App:
         self.selected_blocs = None
         self.selected_bloc_lines = None
         self.sequential_progress = None
-        self.base_line_scores = None
+        self.score_store = None
         self.base_line_score_resume = None
-        self.total_line_scores = None
-        self.final_line_scores = None
         self.final_line_score_resume = None
+        self.line_scheduler = None
+        self.rehearsal_view = None
+        self.rehearsal_cursor = None
+        self.reading_view = None
 
-        self.transcriptions = []
-        for scene_id, raw_transcription in enumerate(raw_transcriptions):
-            blocs = []
-            scene_characters = set()
-            new_character = True
-            for file_line in raw_transcription.split("\n"):
-                file_line = file_line.strip()
-                if not file_line:
-                    new_character = True
-                elif file_line[0] != "#":
-                    if new_character:
-                        line_characters = [
-                            line_character
-                            for w in remove_inline_stage_directions(file_line).split(",")
-                            if (line_character := w.strip()) != ""]
-                        blocs.append({"characters": line_characters, "lines": [], "characters_line": file_line})
-                        if line_characters[0] not in stage_directions_labels:
-                            scene_characters.update([label2main[char] for char in line_characters])
-                        new_character = False
-                    else:
-                        blocs[-1]["lines"].append(file_line)
-
-            self.transcriptions.append({
-                "blocs": blocs,
-                "characters": scene_characters
-            })
+        self.transcriptions = None
 
         home_button = html.BUTTON("⌂", id="home_button")
 
@@ -394,8 +761,46 @@ class App:
 
         document <= home_button + html.DIV(id="main_div")
 
+    def clear_main_div(self):
+        """
+        Removes the current screen. Every screen change goes through here, so that the reading view, if shown, stops
+        observing its nodes.
+        :return:
+        """
+        if self.reading_view is not None:
+            self.reading_view.stop()
+            self.reading_view = None
+        document["main_div"].clear()
+
     def start(self):
-        self.start_menu()
+        if self.transcriptions is None:
+            def callback(transcriptions):
+                self.transcriptions = transcriptions
+                self.start_menu()
+
+            def load():
+                load_transcriptions(callback, lambda message: self.show_loading_error(message, load))
+
+            load()
+        else:
+            self.start_menu()
+
+    def show_loading_error(self, message, retry):
+        """
+        Tells that data could not be loaded, for instance without network, and lets the user try again.
+        :param message: description of the error.
+        :param retry: function () -> None, loading the data again.
+        :return:
+        """
+        panel_message = html.DIV()
+        panel_message <= html.DIV("Impossible de charger la pièce. Vérifiez votre connexion, puis réessayez.")
+        panel_message <= html.BR() + html.DIV(message)
+
+        def callback(button_index):
+            retry()
+
+        self.clear_main_div()
+        document["main_div"] <= create_question_panel(panel_message, ["Réessayer"], callback)
 
     def start_menu(self):
         menu_screen = MenuScreen()
@@ -411,7 +816,7 @@ class App:
                     self.start_selection()
 
         menu_screen.action_observable.subscribe(start_observable_callback)
-        document["main_div"].clear()
+        self.clear_main_div()
         document["main_div"] <= menu_screen.get_html_component()
 
     def start_reading_scene(self):
@@ -422,12 +827,19 @@ class App:
                 reading_selection_screen.remove_root()
 
                 self.selected_scene = reading_selection_screen.scene_observable.value
-                self.selected_blocs = self.transcriptions[self.selected_scene]["blocs"]
 
-                self.simple_reading()
+                def scene_blocs_callback():
+                    self.selected_blocs = self.transcriptions[self.selected_scene]["blocs"]
+                    self.simple_reading()
+
+                def load_scene():
+                    load_scene_blocs(self.transcriptions[self.selected_scene], scene_blocs_callback,
+                                     lambda message: self.show_loading_error(message, load_scene))
+
+                load_scene()
 
         reading_selection_screen.scene_observable.subscribe(scene_observable_callback)
-        document["main_div"].clear()
+        self.clear_main_div()
         document["main_div"] <= reading_selection_screen.get_html_component()
 
     def start_selection(self):
@@ -439,152 +851,180 @@ class App:
 
                 self.selected_character = selection_screen.character_observable.value
                 self.selected_scene = selection_screen.scene_observable.value
-                self.selected_blocs = self.transcriptions[self.selected_scene]["blocs"]
 
-                self.selected_bloc_lines = [
-                    (bloc_index, line_index)
-                    for bloc_index, bloc in enumerate(self.selected_blocs)
-                    if self.selected_character in [
-                        label2main[char] for char in bloc["characters"] if char in label2main]
-                    for line_index in range(len(bloc["lines"]))
-                    if remove_inline_stage_directions(bloc["lines"][line_index]).strip() != ""
-                ]
+                def scene_blocs_callback():
+                    self.selected_blocs = self.transcriptions[self.selected_scene]["blocs"]
+
+                    self.selected_bloc_lines = [
+                        (bloc_index, line_index)
+                        for bloc_index, bloc in enumerate(self.selected_blocs)
+                        if self.selected_character in [
+                            label2main[char] for char in bloc["characters"] if char in label2main]
+                        for line_index in range(len(bloc["lines"]))
+                        if remove_inline_stage_directions(bloc["lines"][line_index]).strip() != ""
+                    ]
+                    self.rehearsal_view = RehearsalView(self.selected_blocs)
+                    self.score_store = ScoreStore(self.selected_scene, self.selected_character, [
+                        self.selected_blocs[bloc_index]["lines"][line_index]
+                        for bloc_index, line_index in self.selected_bloc_lines])
+
+                    self.base_evaluation_introduction()
 
-                self.base_evaluation_introduction()
+                def load_scene():
+                    load_scene_blocs(self.transcriptions[self.selected_scene], scene_blocs_callback,
+                                     lambda message: self.show_loading_error(message, load_scene))
+
+                load_scene()
+
+        def scene_observable_callback(observable):
+            # Starts loading the scene as soon as it is selected, so that it is ready when the game starts. Errors are
+            # only shown if the game is started.
+            if observable.value is not None:
+                load_scene_blocs(self.transcriptions[observable.value], lambda: None, lambda message: None)
 
         selection_screen.start_observable.subscribe(start_observable_callback)
-        document["main_div"].clear()
+        selection_screen.scene_observable.subscribe(scene_observable_callback)
+        self.clear_main_div()
         document["main_div"] <= selection_screen.get_html_component()
 
     def simple_reading(self):
-        # construct text
-        text = []
-        bloc_index = len(self.selected_blocs) - 1
-        line_index = len(self.selected_blocs[bloc_index]["lines"]) - 1
-        while True:
-            raw_line = self.selected_blocs[bloc_index]["lines"][line_index]
-            div = format_line(raw_line)
-            bloc_characters = self.selected_blocs[bloc_index]["characters"]
-            if bloc_characters[0] in stage_directions_labels:
-                div.classList.add("didascalie")
-            text.insert(0, div)
-            if line_index == 0:
-                if bloc_characters[0] not in stage_directions_labels:
-                    text.insert(0, html.DIV(format_line(self.selected_blocs[bloc_index]["characters_line"]),
-                                            Class="character_in_text"))
-                text.insert(0, html.BR())
-            if line_index > 0:
-                line_index -= 1
-            else:
-                if bloc_index > 0:
-                    bloc_index -= 1
-                    line_index = len(self.selected_blocs[bloc_index]["lines"]) - 1
-                else:
-                    break
-
-        document["main_div"].clear()
-        document["main_div"] <= text
+        self.clear_main_div()
+        self.reading_view = ReadingView(self.selected_blocs)
+        document["main_div"] <= self.reading_view.root
+        self.reading_view.start()
 
     def base_evaluation_introduction(self):
-        message = html.DIV("""\
-            Le jeu commence d'abord en mode séquentiel.
-            Les répliques du personnage sont présentées dans l'ordre.""")
-        button_contents = ["C'est parti !"]
+        if self.score_store.load() and self.score_store.is_base_complete():
+            message = html.DIV("""\
+                Vous avez déjà travaillé cette scène avec ce personnage.
+                Vous pouvez reprendre directement en mode aléatoire, ou recommencer en mode séquentiel.""")
+            button_contents = ["Reprendre en mode aléatoire", "Recommencer en mode séquentiel"]
+        elif self.score_store.base is not None:
+            message = html.DIV(f"""\
+                Vous avez commencé le mode séquentiel avec ce personnage, et répondu à
+                {self.score_store.base_progress} répliques sur {self.score_store.n_lines}.
+                Vous pouvez le reprendre où vous en étiez, ou le recommencer.""")
+            button_contents = ["Reprendre le mode séquentiel", "Recommencer en mode séquentiel"]
+        else:
+            message = html.DIV("""\
+                Le jeu commence d'abord en mode séquentiel.
+                Les répliques du personnage sont présentées dans l'ordre.""")
+            button_contents = ["C'est parti !"]
 
         def callback(button_index):
-            self.base_evaluation()
+            if self.score_store.is_base_complete() and button_index == 0:
+                self.base_line_score_resume = get_score_resume(self.score_store.base)
+                self.set_random_seed()
+                self.start_rehearsal("random")
+            elif self.score_store.base is not None and button_index == 0:
+                self.start_rehearsal("base", self.score_store.base_progress)
+            else:
+                self.start_rehearsal("base")
 
-        document["main_div"].clear()
+        self.clear_main_div()
         document["main_div"] <= create_question_panel(message, button_contents, callback)
 
-    def base_evaluation(self):
-        def callback(line_scores):
-            self.base_line_scores = line_scores
-            self.total_line_scores = deepcopy(self.base_line_scores)
-            self.set_random_seed()
-            self.show_base_scores()
-        self.evaluation(callback)
-
     def set_random_seed(self):
         global seed
         seed = 0
-        for line_score in self.base_line_scores.values():
+        base_scores = self.score_store.base
+        for index in range(self.score_store.n_lines):
             seed *= 3
-            seed += line_score["almost"] + 2*line_score["ko"]
+            seed += base_scores[3 * index + 1] + 2*base_scores[3 * index + 2]
             seed %= 2**31
 
-    def evaluation(self, parent_callback, bloc_line_index=0, line_scores=None):
-        if line_scores is None:
-            line_scores = {line: {"perfect": 0, "almost": 0, "ko": 0} for line in self.selected_bloc_lines}
-        if bloc_line_index < len(self.selected_bloc_lines):
-            def callback(result):
-                line_scores[self.selected_bloc_lines[bloc_line_index]][result] += 1
-                self.evaluation(parent_callback, bloc_line_index=bloc_line_index+1, line_scores=line_scores)
-            self.line_evaluation(callback, bloc_line_index)
+    def start_rehearsal(self, mode, n_prompted=0):
+        """
+        Starts a rehearsal of the lines of the selected character, see `RehearsalCursor`.
+        :param mode: "base", "random" or "final".
+        :param n_prompted: in "base" mode, number of lines already answered, whose saved base scores are kept.
+        :return:
+        """
+        cursor = RehearsalCursor(mode, len(self.selected_bloc_lines))
+        if mode == "random":
+            self.line_scheduler = LineScheduler([
+                get_line_score(self.score_store.total, index) for index in range(self.score_store.n_lines)])
+        elif n_prompted > 0:
+            cursor.line_scores = list(self.score_store.base)
+            cursor.n_prompted = n_prompted
         else:
-            parent_callback(line_scores)
-
-    def line_evaluation(self, parent_callback, bloc_line_index):
-        # construct text
-        text = []
-        bloc_index, line_index = self.selected_bloc_lines[bloc_line_index]
-        for back_count in range(self.HISTORY_LENGTH):
-            raw_line = self.selected_blocs[bloc_index]["lines"][line_index]
-            div = format_line(raw_line)
-            div.classList.add(f"bloc_line_back_{back_count}")
-            bloc_characters = self.selected_blocs[bloc_index]["characters"]
-            if bloc_characters[0] in stage_directions_labels:
-                div.classList.add("didascalie")
-            text.insert(0, div)
-            if line_index == 0 or back_count == self.HISTORY_LENGTH - 1:
-                if bloc_characters[0] not in stage_directions_labels:
-                    text.insert(0, html.DIV(format_line(self.selected_blocs[bloc_index]["characters_line"]),
-                                            Class="character_in_text"))
-                text.insert(0, html.BR())
-            if line_index > 0:
-                line_index -= 1
-            else:
-                if bloc_index > 0:
-                    bloc_index -= 1
-                    line_index = len(self.selected_blocs[bloc_index]["lines"]) - 1
-                else:
-                    break
+            cursor.line_scores = self.score_store.new_scores()
+        self.rehearsal_cursor = cursor
+        self.next_prompt()
+
+    def next_prompt(self):
+        cursor = self.rehearsal_cursor
+        if cursor.n_prompted == cursor.n_prompts:
+            self.end_rehearsal()
+            return
+
+        if cursor.mode == "random":
+            # Never asks the same line twice in a row.
+            cursor.bloc_line_index = self.line_scheduler.choose(cursor.bloc_line_index)
+        else:
+            cursor.bloc_line_index = cursor.n_prompted
+        cursor.n_prompted += 1
+        cursor.result = None
 
-        def autonote_callback(button_index):
-            result = ["perfect", "almost", "ko"][button_index]
-            if button_index == 0:
-                parent_callback(result)
-            else:
-                text.extend([html.HR(), html.DIV("Répéter les phrases en couleur jusqu'à les connaître par cœur.")])
-                button_contents = ["C'est fait."]
-                document["main_div"].clear()
-                document["main_div"] <= create_question_panel(text, button_contents, lambda i: parent_callback(result))
+        self.rehearsal_view.show_lines(self.selected_bloc_lines[cursor.bloc_line_index], self.HISTORY_LENGTH)
+        self.show_rehearsal_step("question")
 
-        def question_callback(button_index):
-            text[-1].classList.remove("hidden")
-            if button_index == 0:
-                button_contents = ["J'ai tout bon 😁", "Presque 😊", "Pas bon 😓"]
-                document["main_div"].clear()
-                document["main_div"] <= create_question_panel(text, button_contents, autonote_callback)
-            else:
-                autonote_callback(2)
+    def show_rehearsal_step(self, step):
+        self.rehearsal_cursor.step = step
+        self.rehearsal_view.show_buttons(step, self.rehearsal_button_action)
 
-        # question
-        question_button_contents = ["Je me souviens de la suite et je l'ai récitée.",
-                                    "Je ne me souviens pas de la suite 😔"]
-        text[-1].classList.add("hidden")
-        document["main_div"].clear()
-        document["main_div"] <= create_question_panel(text, question_button_contents, question_callback)
+    def rehearsal_button_action(self, button_index):
+        cursor = self.rehearsal_cursor
+        if cursor.step == "question":
+            self.rehearsal_view.reveal_line()
+            if button_index == 0:
+                self.show_rehearsal_step("grading")
+                return
+            cursor.result = "ko"
+        elif cursor.step == "grading":
+            cursor.result = ["perfect", "almost", "ko"][button_index]
+
+        if cursor.step != "repeat" and cursor.result != "perfect":
+            self.show_rehearsal_step("repeat")
+            return
+
+        score_index = 3 * cursor.bloc_line_index + RESULTS.index(cursor.result)
+        if cursor.mode == "base":
+            cursor.line_scores[score_index] += 1
+            # Saves the progress of the base mode, so that it can be resumed if the page is closed before its end.
+            if cursor.n_prompted < cursor.n_prompts:
+                self.score_store.base_progress = cursor.n_prompted
+                self.score_store.base = cursor.line_scores
+                self.score_store.total = None
+                self.score_store.save()
+        else:
+            if cursor.mode == "final":
+                cursor.line_scores[score_index] += 1
+            self.score_store.total[score_index] += 1
+            self.score_store.save()
+            if cursor.mode == "random":
+                self.line_scheduler.update(
+                    cursor.bloc_line_index, get_line_score(self.score_store.total, cursor.bloc_line_index))
+        self.next_prompt()
+
+    def end_rehearsal(self):
+        cursor = self.rehearsal_cursor
+        self.rehearsal_cursor = None
+        if cursor.mode == "base":
+            self.score_store.base_progress = cursor.n_prompted
+            self.score_store.base = cursor.line_scores
+            self.score_store.total = list(cursor.line_scores)
+            self.score_store.save()
+            self.base_line_score_resume = get_score_resume(self.score_store.base)
+            self.set_random_seed()
+            self.show_base_scores()
+        elif cursor.mode == "random":
+            self.show_final_evaluation_message()
+        else:
+            self.final_line_score_resume = get_score_resume(cursor.line_scores)
+            self.show_final_scores()
 
     def show_base_scores(self):
-        self.base_line_score_resume = {"perfect": 0, "almost": 0, "ko": 0}
-        for v in self.base_line_scores.values():
-            for k in self.base_line_score_resume:
-                self.base_line_score_resume[k] += v[k]
-        # print("show_base_scores")
-        # print(self.base_line_scores)
-        # print(self.base_line_score_resume)
-
         message = html.DIV()
         message <= html.DIV("Voici votre score de base :")
         message <= html.DIV(f"😁 (Parfait !!!) : {self.base_line_score_resume['perfect']}")
@@ -602,44 +1042,15 @@ class App:
 
         def callback(button_index):
             if button_index == 0:
-                self.random_focus(0, None)
+                self.start_rehearsal("random")
             elif button_index == 1:
-                self.final_evaluation()
+                self.start_rehearsal("final")
             else:
                 self.start_selection()
 
-        document["main_div"].clear()
+        self.clear_main_div()
         document["main_div"] <= create_question_panel(message, button_contents, callback)
 
-    def random_focus(self, progress, last_bloc_line_index):
-        progress += 1
-        if progress == 2 * len(self.selected_bloc_lines):
-            self.show_final_evaluation_message()
-        else:
-            # print("choosing random bloc line")
-            # print(self.total_line_scores)
-            # choose bloc line. Lexicographic order. Don't choose last bloc/line
-            worst_score_tuple = (1000000000, 1000000000, 1000000000)
-            worst_indexes = []
-            for bloc_line_index, (bloc, line) in enumerate(self.selected_bloc_lines):
-                if bloc_line_index == last_bloc_line_index:
-                    continue
-                score = self.total_line_scores[(bloc, line)]
-                score_tuple = (score["perfect"], score["almost"], score["ko"])
-                if score_tuple < worst_score_tuple:
-                    worst_score_tuple = score_tuple
-                    worst_indexes = []
-                if score_tuple == worst_score_tuple:
-                    worst_indexes.append(bloc_line_index)
-            bloc_line_index = worst_indexes[randint(len(worst_indexes))]
-            # print(self.selected_bloc_lines[bloc_line_index])
-
-            def callback(result):
-                self.total_line_scores[self.selected_bloc_lines[bloc_line_index]][result] += 1
-                self.random_focus(progress, bloc_line_index)
-
-            self.line_evaluation(callback, bloc_line_index)
-
     def show_final_evaluation_message(self):
         message = html.DIV()
         message <= html.DIV("On y est presque !")
@@ -650,26 +1061,12 @@ class App:
         button_contents = ["Allons-y ! [Alonzo]"]
 
         def callback(button_index):
-            self.final_evaluation()
+            self.start_rehearsal("final")
 
-        document["main_div"].clear()
+        self.clear_main_div()
         document["main_div"] <= create_question_panel(message, button_contents, callback)
 
-    def final_evaluation(self):
-        def callback(line_scores):
-            self.final_line_scores = line_scores
-            for k, v in line_scores.items():
-                for result in ["perfect", "almost", "ko"]:
-                    self.total_line_scores[k][result] += v[result]
-            self.show_final_scores()
-        self.evaluation(callback)
-
     def show_final_scores(self):
-        self.final_line_score_resume = {"perfect": 0, "almost": 0, "ko": 0}
-        for v in self.final_line_scores.values():
-            for k in self.final_line_score_resume:
-                self.final_line_score_resume[k] += v[k]
-
         message = html.DIV()
         message <= html.DIV("Bravo ! Vous êtes allé jusqu'au bout !")
         message <= html.BR()
@@ -689,13 +1086,13 @@ class App:
 
         def callback(button_index):
             if button_index == 0:
-                self.random_focus(0, None)
+                self.start_rehearsal("random")
             elif button_index == 1:
-                self.final_evaluation()
+                self.start_rehearsal("final")
             else:
                 self.start_selection()
 
-        document["main_div"].clear()
+        self.clear_main_div()
         document["main_div"] <= create_question_panel(message, button_contents, callback)
 
 
@@ -0,0 +1,61 @@
+// Service worker keeping a web app and the files it uses in a cache, so that it starts without any network access
+// once visited.
+// Each version of the web app has its own cache. When a new version is installed, files whose content did not change
+// are copied from the caches of previous versions, so that only changed files are downloaded.
+
+// Path of each file, relative to the service worker, and the hash of its content.
+const ASSETS = ##ASSETS##;
+// Name of the web app file, also served for the URL of its folder when it is an index.
+const APP_PATH = ##APP_PATH##;
+const CACHE_PREFIX = "replicreator:" + new URL("./", self.location).href + ":";
+const CACHE_NAME = CACHE_PREFIX + ##CACHE_VERSION##;
+
+const ASSET_PATHS = {};
+for (const path in ASSETS) {
+    ASSET_PATHS[new URL(path, self.location).href] = path;
+}
+if (APP_PATH === "index.html") {
+    ASSET_PATHS[new URL("./", self.location).href] = APP_PATH;
+}
+
+function getCacheKey(path) {
+    return new URL(path, self.location).href + "?replicreator_hash=" + ASSETS[path];
+}
+
+self.addEventListener("install", event => {
+    event.waitUntil(caches.open(CACHE_NAME).then(cache => Promise.all(Object.keys(ASSETS).map(path => {
+        const cacheKey = getCacheKey(path);
+        return caches.match(cacheKey).then(response => response || fetch(path, {cache: "no-cache"}).then(response => {
+            if (!response.ok) {
+                throw new Error(`Cannot fetch ${path}: ${response.status}`);
+            }
+            return response;
+        })).then(response => cache.put(cacheKey, response));
+    }))).then(() => self.skipWaiting()));
+});
+
+self.addEventListener("activate", event => {
+    event.waitUntil(caches.keys().then(cacheNames => Promise.all(
+        cacheNames
+            .filter(cacheName => cacheName.startsWith(CACHE_PREFIX) && cacheName !== CACHE_NAME)
+            .map(cacheName => caches.delete(cacheName))
+    )).then(() => self.clients.claim()));
+});
+
+self.addEventListener("fetch", event => {
+    if (event.request.method !== "GET") {
+        return;
+    }
+    const url = new URL(event.request.url);
+    // Scene files are requested with the beginning of the hash of their content, which must match the cached one.
+    const requestedHash = url.searchParams.get("v");
+    url.search = "";
+    url.hash = "";
+    const path = ASSET_PATHS[url.href];
+    if (path === undefined || (requestedHash !== null && !ASSETS[path].startsWith(requestedHash))) {
+        return;
+    }
+    event.respondWith(caches.open(CACHE_NAME)
+        .then(cache => cache.match(getCacheKey(path)))
+        .then(response => response || fetch(event.request)));
+});
@@ -1,7 +1,10 @@
-from pkg_resources import get_distribution, DistributionNotFound
-
-try:
-    __version__ = get_distribution(__name__).version
-except DistributionNotFound:
-    # package is not installed
-    pass
+def __getattr__(name):
+    # The version is only looked up when asked for, as reading package metadata slows every import down.
+    if name == "__version__":
+        from importlib.metadata import version, PackageNotFoundError
+        try:
+            return version(__name__)
+        except PackageNotFoundError:
+            # package is not installed
+            pass
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,27 @@
-from .util.parameters_loading import load_parameters_yaml
+from .util.build_manifest import BuildManifest, hash_bytes, hash_json, hash_text
+from .util.inline_stage_directions import remove_inline_stage_directions
+from .util.profiling import NoProfiler
+from .util.statistics_matrix import StatisticsMatrix, count_words
+from .util.templates import Template
 
 from pathlib import Path
 import csv
+import functools
+import hashlib
+import io
 import json
+import os
+import re
+import warnings
 
 
-_RES_FOLDER_PATH = Path(__file__).parent / "../../res"
+_PACKAGE_FOLDER_PATH = Path(__file__).parent
+_RES_FOLDER_PATH = _PACKAGE_FOLDER_PATH / "../../res"
+_BRYTHON_SCRIPT_FILE_PATH = _RES_FOLDER_PATH / "deps/Brython-3.9.6/brython.js"
+# Package modules whose sources are embedded in the web app script, so that the web app and the builder or the tests
+# share them.
+_INLINE_STAGE_DIRECTIONS_SCRIPT_FILE_PATH = Path(__file__).parent / "util/inline_stage_directions.py"
+_LINE_SCHEDULER_SCRIPT_FILE_PATH = Path(__file__).parent / "util/line_scheduler.py"
 
 _parameters_schema = {"type": "dict", "schema": {
     "play_name": {"type": "string"},
@@ -27,7 +43,38 @@ _parameters_schema = {"type": "dict", "schema": {
 
     "output": {"type": "dict", "schema": {
         "web_app": {"type": "dict", "schema": {
-            "file_path": {"type": "path", "coerce": "join_base"}
+            "file_path": {"type": "path", "coerce": "join_base"},
+            # "raw": the web app parses the transcriptions when it starts.
+            # "parsed": transcriptions are parsed at build time and embedded as compact JSON data.
+            "transcriptions_format": {"type": "string", "allowed": ["raw", "parsed"], "default": "raw"},
+            # Translates the Python script of the web app to Javascript at build time instead of in the browser.
+            # Requires Node.js.
+            "precompile": {"type": "boolean", "default": False},
+            # "single_file": a self-contained web app.
+            # "split": a web app fetching the data of a scene only when the scene is chosen. Data is written in a
+            # folder next to the web app, named after it. Transcriptions are always parsed at build time.
+            "mode": {"type": "string", "allowed": ["single_file", "split"], "default": "single_file"},
+            # Minifies the web app and writes precompressed copies of it next to it (".gz", and ".br" if brotli is
+            # installed), for servers able to serve them directly.
+            "optimize": {"type": "boolean", "default": False},
+            "size_budget": {"type": "dict", "required": False, "schema": {
+                "max_bytes": {"type": "integer", "min": 1},
+                # What to do when the web app is bigger than max_bytes: "warn" or "fail" without writing it.
+                "action": {"type": "string", "allowed": ["warn", "fail"], "default": "warn"}
+            }},
+            # Writes the Brython runtime in its own file, named after the hash of its content, instead of embedding
+            # it in the web app. Web apps sharing the same folder share the same runtime file, which browsers cache
+            # across plays and versions. Runtime files are never deleted, as other web apps may still use them.
+            "external_runtime": {"type": "dict", "required": False, "schema": {
+                "folder_path": {"type": "path", "coerce": "join_base"},
+                # URL of the folder, as seen from the web app. Relative path from the web app to the folder if not
+                # set.
+                "base_url": {"type": "string", "required": False}
+            }},
+            # Writes a service worker next to the web app, which keeps the web app and the files it uses in a cache
+            # so that it starts without network once visited. Only the files which changed are downloaded again
+            # when a new version is published. Service workers only work when the web app is served over HTTP.
+            "offline": {"type": "boolean", "default": False}
         }},
         "statistics": {"type": "dict", "default": {}, "schema": {
             "base_file_path": {"type": "path", "coerce": "join_base"},
@@ -38,26 +85,138 @@ _parameters_schema = {"type": "dict", "schema": {
             }},
             "compute_total_per_scene": {"type": "boolean"},
             "compute_total_per_character": {"type": "boolean"},
+            # Also exports statistics, blocks and per-line metrics into a SQLite database, which many plays can share.
+            "sqlite": {"type": "dict", "required": False, "schema": {
+                "file_path": {"type": "path", "coerce": "join_base"}
+            }}
+        }},
+        "build_manifest": {"type": "dict", "required": False, "schema": {
+            "file_path": {"type": "path", "coerce": "join_base"}
         }}
     }}
 }}
 
 
-def process_parameters_file(parameters_file_path):
-    parameters = load_parameters_yaml(parameters_file_path, _parameters_schema)
-    process_parameters(parameters)
+def process_parameters_file(parameters_file_path, profiler=None, web_app=True):
+    """
+    :param parameters_file_path:
+    :param profiler: a BuildProfiler recording the stages of the build, or None.
+    :param web_app: see `process_parameters`.
+    :return:
+    """
+    if profiler is None:
+        profiler = NoProfiler()
+    with profiler.stage("load_parameters"):
+        profiler.count_bytes_read(os.path.getsize(parameters_file_path))
+        parameters = load_parameters_file(parameters_file_path)
+    process_parameters(parameters, profiler=profiler, web_app=web_app)
 
 
-def process_parameters(parameters):
-    check_parameters(parameters)
+def load_parameters_file(parameters_file_path):
+    """
+    :param parameters_file_path:
+    :return: parameters read from given yaml file and validated.
+    """
+    # Imported here, as cerberus and yaml are slow to import and are not needed by other functions.
+    from .util.parameters_loading import load_parameters_yaml
+    return load_parameters_yaml(parameters_file_path, _parameters_schema)
+
+
+def process_parameters(parameters, build_manifest=None, profiler=None, web_app=True):
+    """
+    Checks transcriptions, then computes statistics and generates the web app.
+    Scenes whose content did not change since the build recorded in the build manifest are neither parsed nor checked
+    again, and outputs whose content would not change are not rewritten.
+    :param parameters: validated parameters.
+    :param build_manifest: a BuildManifest. If None, it is loaded from the file given in parameters, if any.
+    :param profiler: a BuildProfiler recording each stage of the build, and the loading of each scene, or None.
+    :param web_app: if False, only statistics are computed and saved.
+    :return:
+    """
+    if profiler is None:
+        profiler = NoProfiler()
+    with profiler.stage("check_parameters"):
+        check_parameters(parameters)
+    if build_manifest is None:
+        with profiler.stage("load_build_manifest"):
+            build_manifest = load_build_manifest(parameters)
+    build_manifest.profiler = profiler
 
     main_character_labels = [character["labels"][0] for character in parameters["characters"]]
-    all_lines = [load_lines(scene["file_path"]) for scene in parameters["scenes"]]
+    label2main = create_label2main(parameters)
+    stage_directions_labels = set(parameters["stage_directions"]["labels"])
+    dependencies_hash = hash_json([get_generator_hash(), parameters["stage_directions"], parameters["characters"]])
+    keep_texts = web_app and embeds_transcription_texts(parameters)
+
+    transcriptions = []
+    statistics = StatisticsMatrix(len(parameters["scenes"]), main_character_labels)
+    stale_scene_indexes = []
+    with profiler.stage("load_scenes"):
+        for i, scene in enumerate(parameters["scenes"]):
+            with profiler.stage("load_scene", scene=scene["menu_name"]):
+                # A file is only read if it changed since the previous build, or if its text is embedded in the web app.
+                file_stat = os.stat(scene["file_path"])
+                scene_hash = build_manifest.get_file_hash(scene["file_path"], file_stat)
+                cached_scene = None
+                if scene_hash is not None:
+                    cached_scene = build_manifest.get_scene(BuildManifest.scene_key(scene_hash, dependencies_hash))
+                if cached_scene is None:
+                    transcription = load_transcription(
+                        scene["file_path"], label2main, stage_directions_labels, keep_text=keep_texts,
+                        profiler=profiler)
+                    build_manifest.set_file_hash(scene["file_path"], file_stat, transcription["hash"])
+                    stale_scene_indexes.append(i)
+                else:
+                    transcription = dict(cached_scene["transcription"], hash=scene_hash)
+                    statistics.set_scene_values(i, cached_scene["statistics"])
+                    if keep_texts:
+                        transcription["text"] = read_transcription(scene["file_path"], profiler)
+                transcriptions.append(transcription)
+
+    stale_parameters = dict(parameters, scenes=[parameters["scenes"][i] for i in stale_scene_indexes])
+    stale_transcriptions = [transcriptions[i] for i in stale_scene_indexes]
+    with profiler.stage("check_transcriptions"):
+        check_transcriptions(stale_parameters, stale_transcriptions)
+    with profiler.stage("compute_statistics"):
+        stale_statistics = compute_statistics(stale_parameters, stale_transcriptions, main_character_labels)
+        for stale_index, i in enumerate(stale_scene_indexes):
+            scene_statistics = stale_statistics.get_scene_values(stale_index)
+            statistics.set_scene_values(i, scene_statistics)
+            transcription = {key: value for key, value in transcriptions[i].items() if key not in ["text", "hash"]}
+            build_manifest.set_scene(BuildManifest.scene_key(transcriptions[i]["hash"], dependencies_hash),
+                                     {"transcription": transcription, "statistics": scene_statistics})
+
+    with profiler.stage("save_statistics"):
+        save_statistics(parameters, statistics, build_manifest)
+    with profiler.stage("save_statistics_database"):
+        save_statistics_database(parameters, transcriptions, statistics, build_manifest)
+    if web_app:
+        with profiler.stage("generate_web_app"):
+            generate_web_app(parameters, transcriptions, build_manifest)
+    with profiler.stage("save_build_manifest"):
+        build_manifest.save()
+
+
+def check_parameters_file(parameters_file_path):
+    """
+    Checks parameters and transcriptions, without writing anything. Raises exceptions if they are not consistent.
+    :param parameters_file_path:
+    :return:
+    """
+    parameters = load_parameters_file(parameters_file_path)
+    check_parameters(parameters)
+    label2main = create_label2main(parameters)
+    stage_directions_labels = set(parameters["stage_directions"]["labels"])
+    transcriptions = [load_transcription(scene["file_path"], label2main, stage_directions_labels)
+                      for scene in parameters["scenes"]]
+    check_transcriptions(parameters, transcriptions)
 
-    check_transcriptions(parameters, all_lines)
-    statistics = compute_statistics(parameters, all_lines, main_character_labels)
-    save_statistics(parameters, statistics, main_character_labels)
-    generate_web_app(parameters)
+
+def load_build_manifest(parameters):
+    manifest_parameters = parameters["output"].get("build_manifest")
+    if manifest_parameters is None:
+        return BuildManifest()
+    return BuildManifest(manifest_parameters["file_path"])
 
 
 def check_parameters(parameters):
@@ -78,89 +237,206 @@ def check_parameters(parameters):
             label2char[label] = char
 
 
-def check_transcriptions(parameters, all_lines):
+def create_label2main(parameters):
+    """
+    :param parameters:
+    :return: a dict giving the main label of the character designated by each character label.
+    """
+    label2main = {}
+    for character in parameters["characters"]:
+        main_label = character["labels"][0]
+        for label in character["labels"]:
+            label2main[label] = main_label
+    return label2main
+
+
+def check_transcriptions(parameters, transcriptions):
     """
     Checks transcriptions consistency.
     :param parameters:
-    :param all_lines:
+    :param transcriptions: list of parsed transcriptions, see `parse_transcription`.
     :return:
     """
-    # Checking that characters labels in transcriptions are not unknown.
     stage_directions_labels = set(parameters["stage_directions"]["labels"])
-    all_character_labels = set.union(*[set(character["labels"]) for character in parameters["characters"]])
 
-    for i, (scene, lines) in enumerate(zip(parameters["scenes"], all_lines)):
-        for block in lines:
+    for scene, transcription in zip(parameters["scenes"], transcriptions):
+        for block in transcription["blocks"]:
+            # Checking that stage directions are not mixed with characters.
             if stage_directions_labels.intersection(block["characters"]) and len(block["characters"]) > 1:
-                raise RuntimeError(f"Invalid set of characters {block['characters']} in scene {scene}")
-            for character in block["characters"]:
-                if character not in stage_directions_labels and character not in all_character_labels:
-                    raise RuntimeError(f"Unknown character {character} in scene {scene}.")
-
+                raise RuntimeError(f"Invalid set of characters {block['characters']} in scene {scene} "
+                                   f"(line {block['offset'] + 1}).")
+            # Checking that characters labels in transcriptions are not unknown.
+            for character, main_character in zip(block["characters"], block["main_characters"]):
+                if main_character is None and character not in stage_directions_labels:
+                    raise RuntimeError(f"Unknown character {character} in scene {scene} "
+                                       f"(line {block['offset'] + 1}).")
 
-def compute_statistics(parameters, all_lines, main_character_labels):
-    stage_directions_labels = set(parameters["stage_directions"]["labels"])
-    label2main = {}
-    for character in parameters["characters"]:
-        main_label = character["labels"][0]
-        for label in character["labels"]:
-            label2main[label] = main_label
 
-    statistics = []
-    for i, (scene, lines) in enumerate(zip(parameters["scenes"], all_lines)):
-        scene_statistics = {char: {"lines": 0, "words": 0, "alphanum_chars": 0} for char in main_character_labels}
-        for block in lines:
-            for line in block['lines']:
-                clean_line = "".join([c if c.isalnum() else " " for c in remove_inline_stage_directions(line)])
-                n_words = len(clean_line.split())
-                n_alphanum_chars = sum(c.isalnum() for c in clean_line)
-                for character in block["characters"]:
-                    if character not in stage_directions_labels:
-                        char_stats = scene_statistics[label2main[character]]
-                        char_stats["lines"] += 1
-                        char_stats["words"] += n_words
-                        char_stats["alphanum_chars"] += n_alphanum_chars
-        statistics.append(scene_statistics)
+def compute_statistics(parameters, transcriptions, main_character_labels):
+    """
+    Counts the lines, words and alphanumeric characters said by each main character in each scene.
+    The clean lines of a block are tokenized at once, and the block counts are added to each of its main characters.
+    :param parameters:
+    :param transcriptions: list of parsed transcriptions, see `parse_transcription`.
+    :param main_character_labels: list of main labels of characters.
+    :return: a StatisticsMatrix with a scene per transcription.
+    """
+    statistics = StatisticsMatrix(len(transcriptions), main_character_labels)
+    character_indexes = {label: i for i, label in enumerate(main_character_labels)}
+    values = statistics.values
+    for scene_index, transcription in enumerate(transcriptions):
+        for block in transcription["blocks"]:
+            block_character_indexes = [
+                character_indexes[main_character]
+                for main_character in block["main_characters"] if main_character is not None]
+            if not block_character_indexes:
+                continue
+            clean_lines = [remove_inline_stage_directions(line) for line in block["lines"]]
+            n_words, n_alphanum_chars = count_words("\n".join(clean_lines))
+            block_values = {"lines": len(clean_lines), "words": n_words, "alphanum_chars": n_alphanum_chars}
+            block_values = [block_values[metric] for metric in statistics.metrics]
+            for character_index in block_character_indexes:
+                start = statistics.index(scene_index, character_index, 0)
+                for metric_index, value in enumerate(block_values):
+                    values[start + metric_index] += value
 
     return statistics
 
 
-def save_statistics(parameters, statistics, main_character_labels):
-    for metric in ["lines", "words", "alphanum_chars"]:
-        if parameters["output"]["statistics"]["metrics"][metric]:
-            file_path = str(parameters["output"]["statistics"]["base_file_path"]) + f"_{metric}.csv"
-            with open(file_path, 'w', newline='', encoding="utf8") as csvfile:
+def save_statistics(parameters, statistics, build_manifest=None):
+    """
+    Writes a CSV file per enabled metric, with a row per scene and a column per character.
+    :param parameters:
+    :param statistics: a StatisticsMatrix with a scene per scene of parameters, see `compute_statistics`.
+    :param build_manifest: a BuildManifest, used to skip unchanged files.
+    :return:
+    """
+    if build_manifest is None:
+        build_manifest = BuildManifest()
+    statistics_parameters = parameters["output"]["statistics"]
+    for metric in statistics.metrics:
+        if statistics_parameters["metrics"][metric]:
+            file_path = str(statistics_parameters["base_file_path"]) + f"_{metric}.csv"
+            metric_rows = statistics.metric_rows(metric)
+            with io.StringIO(newline='') as csvfile:
                 writer = csv.writer(csvfile, delimiter=',')
-                row = ["scene name"] + main_character_labels
-                if parameters["output"]["statistics"]["compute_total_per_scene"]:
+                row = ["scene name"] + statistics.character_labels
+                if statistics_parameters["compute_total_per_scene"]:
                     row.append("TOTAL")
                 writer.writerow(row)
 
-                stat_row_cumul = None
+                for metric_row, scene in zip(metric_rows, parameters["scenes"]):
+                    row = [scene["menu_name"]] + metric_row
+                    if statistics_parameters["compute_total_per_scene"]:
+                        row.append(sum(metric_row))
+                    writer.writerow(row)
 
-                for scene_statistics, scene in zip(statistics, parameters["scenes"]):
-                    row = [scene["menu_name"]] + [scene_statistics[char][metric] for char in main_character_labels]
-                    if parameters["output"]["statistics"]["compute_total_per_scene"]:
+                if statistics_parameters["compute_total_per_character"]:
+                    row = ["TOTAL"] + [sum(column) for column in zip(*metric_rows)]
+                    if statistics_parameters["compute_total_per_scene"]:
                         row.append(sum(row[1:]))
                     writer.writerow(row)
 
-                    if stat_row_cumul is None:
-                        stat_row_cumul = row[1:]
-                    else:
-                        stat_row_cumul = [a + b for a, b in zip(stat_row_cumul, row[1:])]
+                build_manifest.write_output(file_path, csvfile.getvalue(), newline='')
 
-                if parameters["output"]["statistics"]["compute_total_per_character"]:
-                    row = ["TOTAL"] + stat_row_cumul
-                    writer.writerow(row)
 
+def save_statistics_database(parameters, transcriptions, statistics, build_manifest=None):
+    """
+    Exports statistics into the SQLite database given in parameters, if any, see `write_statistics_database`.
+    :param parameters:
+    :param transcriptions: list of parsed transcriptions, see `parse_transcription`.
+    :param statistics: a StatisticsMatrix with a scene per scene of parameters, see `compute_statistics`.
+    :param build_manifest: a BuildManifest, used to skip the export if none of its inputs changed since the previous
+    one.
+    :return:
+    """
+    if build_manifest is None:
+        build_manifest = BuildManifest()
+    database_parameters = parameters["output"]["statistics"].get("sqlite")
+    if database_parameters is None:
+        return
+    scene_names = [scene["menu_name"] for scene in parameters["scenes"]]
+    export_hash = hash_json([
+        get_generator_hash(), parameters["play_name"], parameters["version"], scene_names,
+        parameters["stage_directions"], parameters["characters"],
+        [transcription["hash"] for transcription in transcriptions]])
+    if build_manifest.is_output_up_to_date(database_parameters["file_path"], export_hash):
+        return
+    # Imported here, as most builds do not export statistics to a database.
+    from .util.statistics_database import write_statistics_database
+    write_statistics_database(
+        database_parameters["file_path"], parameters["play_name"], parameters["version"], scene_names, transcriptions,
+        statistics)
+    build_manifest.record_output(database_parameters["file_path"], export_hash)
+
+
+def read_transcription(transcription_file_path, profiler=None):
+    with open(transcription_file_path, 'r', encoding='utf-8') as f:
+        if profiler is not None:
+            profiler.count_bytes_read(os.fstat(f.fileno()).st_size)
+        return f.read()
+
+
+def embeds_transcription_texts(parameters):
+    """
+    :param parameters: validated parameters.
+    :return: True if the web app embeds the text of the transcriptions, which is then kept in memory by the build.
+    """
+    web_app_parameters = parameters["output"]["web_app"]
+    return web_app_parameters["mode"] != "split" and web_app_parameters["transcriptions_format"] == "raw"
 
-def load_lines(transcription_file_path):
-    with open(transcription_file_path, encoding="utf8") as f:
-        file_lines = [line.strip() for line in f.readlines()]
 
-    theatrical_lines = []
+def load_transcription(transcription_file_path, label2main, stage_directions_labels, keep_text=False, profiler=None):
+    """
+    Reads and parses a transcription file line by line, hashing its content on the way.
+    :param transcription_file_path:
+    :param label2main: see `create_label2main`.
+    :param stage_directions_labels: set of stage directions labels.
+    :param keep_text: if True, the file content is kept too. Only needed by web apps embedding raw transcriptions.
+    :param profiler: a BuildProfiler counting read bytes, or None.
+    :return: the parsed transcription (see `parse_transcription`), with the hash of the file content under "hash", as
+    `hash_text` would give for its text, and the file content under "text" if keep_text is True.
+    """
+    hasher = hashlib.sha256()
+    text_lines = []
+
+    def read_lines(f):
+        for file_line in f:
+            hasher.update(file_line.encode("utf8"))
+            if keep_text:
+                text_lines.append(file_line)
+            yield file_line
+
+    with open(transcription_file_path, 'r', encoding='utf-8') as f:
+        if profiler is not None:
+            profiler.count_bytes_read(os.fstat(f.fileno()).st_size)
+        transcription = parse_transcription(read_lines(f), label2main, stage_directions_labels)
+    transcription["hash"] = hasher.hexdigest()
+    if keep_text:
+        transcription["text"] = "".join(text_lines)
+    return transcription
+
+
+def parse_transcription(transcription_lines, label2main, stage_directions_labels):
+    """
+    Parses a transcription in a single pass over its lines, which are not kept once parsed.
+    The result is the only representation of the transcription used by checks, statistics and web app generation.
+    :param transcription_lines: iterable over the lines of a transcription, such as a file opened in text mode.
+    :param label2main: see `create_label2main`.
+    :param stage_directions_labels: set of stage directions labels.
+    :return: a dict with key "blocks", a list of dicts with keys:
+    - "characters": labels of the characters speaking, as written in the transcription.
+    - "main_characters": main label of each of these characters, None for stage directions and unknown labels.
+    - "is_stage_direction": True if the block is a stage direction.
+    - "characters_line": raw line introducing the block.
+    - "offset": index of this line in the transcription file.
+    - "lines": raw lines of the block. Inline stage directions are removed when needed, see
+    `remove_inline_stage_directions`.
+    """
+    blocks = []
     new_character = True
-    for file_line in file_lines:
+    for offset, file_line in enumerate(transcription_lines):
+        file_line = file_line.strip()
         if not file_line:
             new_character = True
         elif file_line[0] != "#":
@@ -169,73 +445,501 @@ def load_lines(transcription_file_path):
                     character
                     for w in remove_inline_stage_directions(file_line).split(",")
                     if (character := w.strip()) != ""]
-                theatrical_lines.append({"characters": block_characters, "lines": [], "characters_line": file_line})
+                blocks.append({
+                    "characters": block_characters,
+                    "main_characters": [label2main.get(character) for character in block_characters],
+                    "is_stage_direction": bool(block_characters) and block_characters[0] in stage_directions_labels,
+                    "characters_line": file_line,
+                    "offset": offset,
+                    "lines": []
+                })
                 new_character = False
             else:
-                theatrical_lines[-1]["lines"].append(file_line)
+                blocks[-1]["lines"].append(file_line)
 
-    return theatrical_lines
+    return {"blocks": blocks}
 
 
-def remove_inline_stage_directions(line):
-    clean_line_chunks = []
-    while line:
-        if line[0] == "(":
-            end = line.find(")")
-            if end == -1:
-                len(line) - 1
-            line = line[end + 1:]
-        else:
-            begin = line.find("(")
-            if begin == -1:
-                begin = len(line)
-            clean_line_chunks.append(line[:begin])
-            line = line[begin:]
-    return "".join(clean_line_chunks)
+@functools.lru_cache(maxsize=None)
+def get_generator_hash():
+    """
+    Hash of the source of the package modules. Build manifest records depend on it, so that they are not reused once
+    replicreator is upgraded or modified.
+    It is computed only once per process.
+    :return:
+    """
+    return hash_json({
+        file_path.relative_to(_PACKAGE_FOLDER_PATH).as_posix(): hash_bytes(file_path.read_bytes())
+        for file_path in sorted(_PACKAGE_FOLDER_PATH.rglob("*.py"))})
 
 
-def generate_web_app(parameters):
-    version = parameters["version"]
+@functools.lru_cache(maxsize=None)
+def load_web_app_resources():
+    """
+    Reads the templates and the Brython runtime used to generate web apps.
+    They are read only once per process and shared by every following build.
+    :return: a dict of resource texts, plus their combined hash under "hash".
+    """
+    resource_file_paths = {
+        "template_app": _RES_FOLDER_PATH / "template_app.html",
+        "template_python_main_script": _RES_FOLDER_PATH / "template_python_main_script.py",
+        "template_precompiled_main_script": _RES_FOLDER_PATH / "template_precompiled_main_script.js",
+        "template_service_worker": _RES_FOLDER_PATH / "template_service_worker.js",
+        "brython_script": _BRYTHON_SCRIPT_FILE_PATH,
+        "inline_stage_directions_script": _INLINE_STAGE_DIRECTIONS_SCRIPT_FILE_PATH,
+        "line_scheduler_script": _LINE_SCHEDULER_SCRIPT_FILE_PATH,
+    }
+    resources = {}
+    for name, file_path in resource_file_paths.items():
+        with open(file_path, "r", encoding='utf-8') as f:
+            resources[name] = f.read()
+    resources["hash"] = hash_json({name: hash_text(text) for name, text in resources.items()})
+    return resources
 
-    template_app_file_path = _RES_FOLDER_PATH / "template_app.html"
-    template_python_main_script_file_path = _RES_FOLDER_PATH / "template_python_main_script.py"
-    brython_script_file_path = _RES_FOLDER_PATH / "deps/Brython-3.9.6/brython.js"
-    app_file_path = parameters["output"]["web_app"]["file_path"]
 
-    transcriptions_script_chunks = []
-    for scene in parameters["scenes"]:
-        with open(scene["file_path"], 'r', encoding='utf-8') as f:
-            text = f.read()
-        transcription_script_chunk = f'''\
-    """\\
-{text}""",
-'''
-        transcriptions_script_chunks.append(transcription_script_chunk)
-    transcriptions_script = "".join(transcriptions_script_chunks)
+@functools.lru_cache(maxsize=None)
+def load_minified_web_app_resources():
+    """
+    :return: same as `load_web_app_resources`, with minified style sheet and Javascript templates. The Brython runtime
+    is already minified.
+    """
+    from .util.minification import minify_html_styles, minify_js
+    resources = dict(load_web_app_resources())
+    resources["template_app"] = minify_html_styles(resources["template_app"])
+    resources["template_precompiled_main_script"] = minify_js(resources["template_precompiled_main_script"])
+    resources["template_service_worker"] = minify_js(resources["template_service_worker"])
+    return resources
+
+
+@functools.lru_cache(maxsize=None)
+def load_web_app_templates(optimize):
+    """
+    :param optimize: if True, templates are compiled from minified resources.
+    :return: a dict giving the compiled Template of each template resource.
+    """
+    resources = load_minified_web_app_resources() if optimize else load_web_app_resources()
+    return {
+        name: Template(resources[name])
+        for name in ["template_app", "template_python_main_script", "template_precompiled_main_script",
+                     "template_service_worker"]
+    }
+
+
+def generate_web_app(parameters, transcriptions=None, build_manifest=None):
+    """
+    Generates the web app, and the data files it fetches when it is split.
+    :param parameters: validated parameters.
+    :param transcriptions: parsed transcription of each scene, see `load_transcription`, with their file content if
+    the web app embeds it (see `embeds_transcription_texts`). Loaded from files if None.
+    :param build_manifest: a BuildManifest. Generation is skipped if it reports an up-to-date web app.
+    :return:
+    """
+    version = parameters["version"]
+    web_app_parameters = parameters["output"]["web_app"]
+    app_file_path = Path(web_app_parameters["file_path"])
+    split = web_app_parameters["mode"] == "split"
+    data_folder_path = app_file_path.parent / f"{app_file_path.stem}_data"
+
+    if transcriptions is None:
+        label2main = create_label2main(parameters)
+        stage_directions_labels = set(parameters["stage_directions"]["labels"])
+        keep_texts = embeds_transcription_texts(parameters)
+        transcriptions = [load_transcription(scene["file_path"], label2main, stage_directions_labels, keep_texts)
+                          for scene in parameters["scenes"]]
+    if build_manifest is None:
+        build_manifest = BuildManifest()
+    # Imported here, as statistics-only builds and checks do not need them.
+    from .util.compression import available_encodings, ENCODING_EXTENSIONS
+    from .util.minification import minify_js, minify_python
+
+    optimize = web_app_parameters["optimize"]
+    resources = load_minified_web_app_resources() if optimize else load_web_app_resources()
+    templates = load_web_app_templates(optimize)
 
     scriptable_parameters = {
         "play_name": parameters["play_name"],
         "stage_directions": parameters["stage_directions"],
         "characters": parameters["characters"],
         "scenes": [{"menu_name": scene["menu_name"]} for scene in parameters["scenes"]],
+        "character_scenes": create_character_scenes_index(parameters, transcriptions),
         "version": parameters["version"]
     }
-    parameters_script = json.dumps(scriptable_parameters, ensure_ascii=False, indent=4)
+    if split:
+        scriptable_parameters["data_folder"] = data_folder_path.name
+
+    # The web app is fully determined by the code generating it, its templates, its parameters and the scene texts.
+    app_hash = hash_json([
+        get_generator_hash(),
+        resources["hash"],
+        web_app_parameters,
+        scriptable_parameters,
+        [transcription["hash"] for transcription in transcriptions]
+    ])
+    # A split page does not depend on scene texts, so that browsers keep it when only scenes change.
+    page_hash = app_hash
+    if split:
+        page_hash = hash_json([get_generator_hash(), resources["hash"], web_app_parameters, scriptable_parameters])
+
+    # Every file owned by the web app, with the hash identifying its content, known without generating anything.
+    output_hashes = {app_file_path: page_hash}
+    if split:
+        # The index is rewritten whenever anything changes, so it records the whole build.
+        output_hashes[data_folder_path / "index.json"] = app_hash
+        for scene_id, transcription in enumerate(transcriptions):
+            output_hashes[data_folder_path / f"scene_{scene_id}.json"] = get_scene_data_hash(parameters, transcription)
+    # Hash of the content of each file used by the web app, by path relative to the folder of the web app.
+    asset_hashes = {
+        file_path.relative_to(app_file_path.parent).as_posix(): content_hash
+        for file_path, content_hash in output_hashes.items()}
+
+    # The external runtime is shared with other web apps, which may have written it, so it is only checked for
+    # existence.
+    external_runtime_parameters = web_app_parameters.get("external_runtime")
+    runtime_file_paths = []
+    if external_runtime_parameters is not None:
+        runtime_file_path, runtime_url = get_external_runtime(
+            app_file_path, external_runtime_parameters, resources["brython_script"])
+        runtime_file_paths.append(runtime_file_path)
+        asset_hashes[runtime_url] = hash_text(resources["brython_script"])
+
+    service_worker_file_path = app_file_path.parent / f"{app_file_path.stem}_service_worker.js"
+    if web_app_parameters["offline"]:
+        service_worker_script = create_service_worker_script(
+            templates["template_service_worker"], app_file_path.name, version, asset_hashes)
+        output_hashes[service_worker_file_path] = hash_text(service_worker_script)
+
+    if optimize:
+        for file_path, content_hash in list(output_hashes.items()):
+            for encoding in available_encodings():
+                output_hashes[Path(f"{file_path}{ENCODING_EXTENSIONS[encoding]}")] = f"{content_hash}-{encoding}"
+        runtime_file_paths += [
+            Path(f"{file_path}{ENCODING_EXTENSIONS[encoding]}")
+            for file_path in runtime_file_paths for encoding in available_encodings()]
+    # Outputs are checked one by one, so that a deleted output is written again.
+    if all(build_manifest.is_output_up_to_date(file_path, content_hash)
+           for file_path, content_hash in output_hashes.items()) and all(
+            file_path.exists() for file_path in runtime_file_paths):
+        return
+
+    transcriptions_data = None
+    transcriptions_script_chunks = []
+    if split:
+        index, scenes_data = create_split_transcriptions_data(parameters, transcriptions)
+        data_folder_path.mkdir(exist_ok=True)
+        for scene_id, scene_data in enumerate(scenes_data):
+            scene_data_file_path = data_folder_path / f"scene_{scene_id}.json"
+            scene_data_hash = output_hashes[scene_data_file_path]
+            write_web_app_file(build_manifest, scene_data_file_path, scene_data, optimize, content_hash=scene_data_hash)
+        write_web_app_file(build_manifest, data_folder_path / "index.json", index, optimize, content_hash=app_hash)
+    elif web_app_parameters["transcriptions_format"] == "parsed":
+        transcriptions_data = create_transcriptions_data(parameters, transcriptions)
+    else:
+        for transcription in transcriptions:
+            transcription_script_chunk = f'''\
+    """\\
+{transcription["text"]}""",
+'''
+            transcriptions_script_chunks.append(transcription_script_chunk)
+    # "<" is escaped so that data cannot close the script element containing it.
+    transcriptions_data_script = json.dumps(
+        transcriptions_data, ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c")
+
+    if optimize:
+        parameters_script = json.dumps(scriptable_parameters, ensure_ascii=False, separators=(",", ":"))
+    else:
+        parameters_script = json.dumps(scriptable_parameters, ensure_ascii=False, indent=4)
+
+    python_main_script = templates["template_python_main_script"].render({
+        "RAW_TRANSCRIPTIONS": transcriptions_script_chunks,
+        "PARAMETERS": parameters_script,
+        "INLINE_STAGE_DIRECTIONS": resources["inline_stage_directions_script"],
+        "LINE_SCHEDULER": resources["line_scheduler_script"],
+    })
+    if optimize:
+        python_main_script = minify_python(python_main_script)
+
+    if web_app_parameters["precompile"]:
+        from .util.brython_compilation import compile_python_to_js
+        precompiled_python_main_script = compile_python_to_js(python_main_script, _BRYTHON_SCRIPT_FILE_PATH)
+        if optimize:
+            precompiled_python_main_script = minify_js(precompiled_python_main_script)
+        # Scripts may contain "</script>" in string literals, which would close the script element.
+        precompiled_python_main_script = re.sub(
+            r"</(script)", r"<\\/\1", precompiled_python_main_script, flags=re.IGNORECASE)
+        main_script = list(templates["template_precompiled_main_script"].iter_chunks(
+            {"PRECOMPILED_PYTHON_MAIN_SCRIPT": precompiled_python_main_script}))
+        main_script_type = "text/javascript"
+        onload = "run_precompiled_main_script()"
+    else:
+        main_script = python_main_script
+        main_script_type = "text/python"
+        onload = "brython()"
+
+    if external_runtime_parameters is None:
+        brython_script_element = ['<script type="text/javascript">\n', resources["brython_script"], '\n    </script>']
+    else:
+        write_external_runtime(build_manifest, runtime_file_path, resources["brython_script"], optimize)
+        brython_script_element = f'<script type="text/javascript" src="{runtime_url}"></script>'
+
+    if web_app_parameters["offline"]:
+        service_worker_registration = f"""
+<script type="text/javascript">
+if ("serviceWorker" in navigator && location.protocol !== "file:") {{
+    navigator.serviceWorker.register({json.dumps(service_worker_file_path.name)});
+}}
+</script>"""
+    else:
+        service_worker_registration = ""
+
+    app_values = {
+        "PLAY_NAME": parameters["play_name"],
+        "VERSION": version,
+        "BRYTHON_SCRIPT": brython_script_element,
+        "ONLOAD": onload,
+        "TRANSCRIPTIONS_DATA": transcriptions_data_script,
+        "MAIN_SCRIPT_TYPE": main_script_type,
+        "MAIN_SCRIPT": main_script,
+        "SERVICE_WORKER_REGISTRATION": service_worker_registration,
+    }
+    write_rendered_web_app_file(
+        build_manifest, app_file_path, templates["template_app"], app_values, optimize, content_hash=page_hash,
+        size_budget=web_app_parameters.get("size_budget"))
+
+    if web_app_parameters["offline"]:
+        write_web_app_file(build_manifest, service_worker_file_path, service_worker_script, optimize,
+                           content_hash=output_hashes[service_worker_file_path])
 
-    with open(template_python_main_script_file_path, "r", encoding='utf-8') as f:
-        template_python_main_script = f.read()
-    python_main_script = template_python_main_script.replace("##RAW_TRANSCRIPTIONS##", transcriptions_script)
-    python_main_script = python_main_script.replace("##PARAMETERS##", parameters_script)
 
-    with open(brython_script_file_path, "r", encoding='utf-8') as f:
-        brython_script = f.read()
+def create_service_worker_script(template_service_worker, app_path, version, asset_hashes):
+    """
+    :param template_service_worker: Template of the service worker script.
+    :param app_path: path of the web app, relative to the service worker.
+    :param version: version of the play.
+    :param asset_hashes: dict giving the hash of the content of each file to cache, by path relative to the service
+    worker.
+    :return: the service worker script. Its cache is named after the version of the play and the hashes of the files,
+    so that browsers install it again whenever a file changes.
+    """
+    cache_version = f"{version}:{hash_json(asset_hashes)[:16]}"
+    return template_service_worker.render({
+        "ASSETS": json.dumps(asset_hashes, ensure_ascii=False, sort_keys=True),
+        "APP_PATH": json.dumps(app_path),
+        "CACHE_VERSION": json.dumps(cache_version),
+    })
 
-    with open(template_app_file_path, "r", encoding='utf-8') as f:
-        template_app_script = f.read()
-    app_script = template_app_script.replace("##PYTHON_MAIN_SCRIPT##", python_main_script)
-    app_script = app_script.replace("##PLAY_NAME##", parameters["play_name"])
-    app_script = app_script.replace("##VERSION##", version)
-    app_script = app_script.replace("<!--##BRYTHON_SCRIPT##-->", brython_script)
 
-    with open(app_file_path, "w", encoding='utf-8') as f:
-        f.write(app_script)
+def write_rendered_web_app_file(build_manifest, file_path, template, values, optimize, content_hash=None,
+                                size_budget=None):
+    """
+    Writes a rendered template as a file of the web app, along with its precompressed copies if the web app is
+    optimized. The rendered text is streamed to a temporary file, which only replaces the file if its content changed.
+    :param build_manifest: a BuildManifest.
+    :param file_path:
+    :param template: a Template.
+    :param values: see `Template.iter_chunks`.
+    :param optimize: if True, precompressed copies are written too.
+    :param content_hash: see `BuildManifest.write_output`. Hash of the rendered content if None.
+    :param size_budget: see `check_size_budget`.
+    :return: the content hash.
+    """
+    tmp_file_path = f"{file_path}.tmp"
+    try:
+        with open(tmp_file_path, "wb") as f:
+            size, rendered_content_hash = template.write(f, values)
+        check_size_budget(file_path, size, size_budget)
+    except BaseException:
+        if os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
+        raise
+    if content_hash is None:
+        content_hash = rendered_content_hash
+    build_manifest.replace_output(file_path, tmp_file_path, content_hash)
+
+    if optimize:
+        from .util.compression import available_encodings, compress_file, ENCODING_EXTENSIONS
+        for encoding in available_encodings():
+            compressed_file_path = f"{file_path}{ENCODING_EXTENSIONS[encoding]}"
+            compressed_content_hash = f"{content_hash}-{encoding}"
+            if not build_manifest.is_output_up_to_date(compressed_file_path, compressed_content_hash):
+                tmp_compressed_file_path = f"{compressed_file_path}.tmp"
+                compress_file(file_path, tmp_compressed_file_path, encoding)
+                build_manifest.replace_output(compressed_file_path, tmp_compressed_file_path, compressed_content_hash)
+    return content_hash
+
+
+def write_web_app_file(build_manifest, file_path, content, optimize, content_hash=None):
+    """
+    Writes a file of the web app, along with its precompressed copies if the web app is optimized.
+    :param build_manifest: a BuildManifest.
+    :param file_path:
+    :param content: string
+    :param optimize: if True, precompressed copies are written too.
+    :param content_hash: see `BuildManifest.write_output`.
+    :return:
+    """
+    if content_hash is None:
+        content_hash = hash_text(content)
+    build_manifest.write_output(file_path, content, content_hash=content_hash)
+    if optimize:
+        from .util.compression import available_encodings, compress, ENCODING_EXTENSIONS
+        for encoding in available_encodings():
+            compressed_file_path = f"{file_path}{ENCODING_EXTENSIONS[encoding]}"
+            compressed_content_hash = f"{content_hash}-{encoding}"
+            if not build_manifest.is_output_up_to_date(compressed_file_path, compressed_content_hash):
+                build_manifest.write_output(compressed_file_path, compress(content.encode("utf8"), encoding),
+                                            content_hash=compressed_content_hash)
+
+
+def get_external_runtime(app_file_path, external_runtime_parameters, brython_script):
+    """
+    :param app_file_path: path of the web app using the runtime.
+    :param external_runtime_parameters: dict with keys "folder_path" and optionally "base_url".
+    :param brython_script: content of the runtime.
+    :return: (path of the runtime file, named after the hash of its content, URL of the file as seen from the web app).
+    """
+    file_name = f"brython.{hash_text(brython_script)[:16]}.js"
+    folder_path = Path(external_runtime_parameters["folder_path"])
+    base_url = external_runtime_parameters.get("base_url")
+    if base_url is None:
+        base_url = Path(os.path.relpath(folder_path, Path(app_file_path).parent)).as_posix()
+    return folder_path / file_name, f"{base_url.rstrip('/')}/{file_name}"
+
+
+def write_external_runtime(build_manifest, file_path, brython_script, optimize):
+    """
+    Writes the Brython runtime in its file, see `get_external_runtime`, unless it already exists.
+    :param build_manifest: a BuildManifest.
+    :param file_path: path of the runtime file.
+    :param brython_script: content of the runtime.
+    :param optimize: if True, precompressed copies are written too.
+    :return:
+    """
+    content_hash = hash_text(brython_script)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    files = [(file_path, brython_script, content_hash)]
+    if optimize:
+        from .util.compression import available_encodings, compress, ENCODING_EXTENSIONS
+        for encoding in available_encodings():
+            compressed_file_path = Path(f"{file_path}{ENCODING_EXTENSIONS[encoding]}")
+            if not compressed_file_path.exists():
+                files.append((compressed_file_path, compress(brython_script.encode("utf8"), encoding),
+                              f"{content_hash}-{encoding}"))
+    # The file name identifies its content, so existing files, maybe written by the build of another play, are kept
+    # as is. Files are written under a name of their own, then moved in place, so that parallel builds sharing the
+    # runtime never read or serve a partly written file.
+    for shared_file_path, content, shared_content_hash in files:
+        if shared_file_path.exists():
+            continue
+        tmp_file_path = f"{shared_file_path}.{os.getpid()}.tmp"
+        try:
+            if isinstance(content, bytes):
+                with open(tmp_file_path, "wb") as f:
+                    f.write(content)
+            else:
+                with open(tmp_file_path, "w", encoding="utf8") as f:
+                    f.write(content)
+        except BaseException:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+            raise
+        build_manifest.replace_output(shared_file_path, tmp_file_path, shared_content_hash)
+
+
+def check_size_budget(file_path, size, size_budget):
+    """
+    Warns or raises an exception, depending on the budget action, if a file exceeds its size budget.
+    :param file_path:
+    :param size: size of the file content, in bytes.
+    :param size_budget: None or dict with keys "max_bytes" and "action".
+    :return:
+    """
+    if size_budget is None or size <= size_budget["max_bytes"]:
+        return
+    message = f"{file_path} is {size} bytes, which exceeds its size budget of {size_budget['max_bytes']} bytes."
+    if size_budget["action"] == "fail":
+        raise RuntimeError(message)
+    warnings.warn(message)
+
+
+def get_scene_characters(transcription):
+    """
+    :param transcription: parsed transcription, see `parse_transcription`.
+    :return: set of the main labels of the characters speaking in the scene.
+    """
+    scene_characters = set()
+    for block in transcription["blocks"]:
+        if not block["is_stage_direction"]:
+            scene_characters.update(block["main_characters"])
+    return scene_characters
+
+
+def create_character_scenes_index(parameters, transcriptions):
+    """
+    :param parameters:
+    :param transcriptions: list of parsed transcriptions, see `parse_transcription`.
+    :return: dict giving, for the main label of each character, the sorted list of the indexes of the scenes in which
+    the character speaks.
+    """
+    character_scenes = {character["labels"][0]: [] for character in parameters["characters"]}
+    for scene_id, transcription in enumerate(transcriptions):
+        for character in get_scene_characters(transcription):
+            if character in character_scenes:
+                character_scenes[character].append(scene_id)
+    return character_scenes
+
+
+def create_transcriptions_data(parameters, transcriptions):
+    """
+    Creates compact data describing parsed transcriptions, to be embedded in the web app.
+    Data only contains lists, strings and integers, which are converted to Python objects without any parsing work
+    from the web app. Character labels are replaced by their index in a table of labels.
+    :param parameters:
+    :param transcriptions: list of parsed transcriptions, see `parse_transcription`.
+    :return: [labels, scenes] where labels is the list of all labels and each scene is its list of blocks, each block
+    being [character label indices, characters line, lines]. The scenes of each character are given by
+    `create_character_scenes_index`.
+    """
+    labels = list(parameters["stage_directions"]["labels"])
+    for character in parameters["characters"]:
+        labels.extend(character["labels"])
+    label2index = {label: i for i, label in enumerate(labels)}
+
+    scenes = []
+    for transcription in transcriptions:
+        blocks = []
+        for block in transcription["blocks"]:
+            blocks.append([
+                [label2index[character] for character in block["characters"]],
+                block["characters_line"],
+                block["lines"]
+            ])
+        scenes.append(blocks)
+
+    return [labels, scenes]
+
+
+def get_scene_data_hash(parameters, transcription):
+    """
+    :param parameters:
+    :param transcription: parsed transcription, see `load_transcription`.
+    :return: hash identifying the data file of the scene in a split web app, see `create_split_transcriptions_data`,
+    known without creating it.
+    """
+    return hash_json([
+        get_generator_hash(), parameters["stage_directions"], parameters["characters"], transcription["hash"]])
+
+
+def create_split_transcriptions_data(parameters, transcriptions):
+    """
+    Creates the data files fetched by a split web app: an index describing all scenes, and the blocks of each scene.
+    :param parameters:
+    :param transcriptions: list of parsed transcriptions, see `load_transcription`.
+    :return: (index, scenes data) as JSON strings. The index is [labels, scenes] where each scene is given by the
+    beginning of the hash of its data, see `get_scene_data_hash`. Scene data is its list of blocks, as in
+    `create_transcriptions_data`.
+    """
+    labels, scenes = create_transcriptions_data(parameters, transcriptions)
+    scenes_data = [json.dumps(blocks, ensure_ascii=False, separators=(",", ":")) for blocks in scenes]
+    scenes_index = [get_scene_data_hash(parameters, transcription)[:16] for transcription in transcriptions]
+    index = json.dumps([labels, scenes_index], ensure_ascii=False, separators=(",", ":"))
+    return index, scenes_data
@@ -0,0 +1,130 @@
+from .app import process_parameters_file, load_web_app_resources
+from .cli import add_batch_arguments
+from .util.profiling import BuildProfiler
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import glob
+import sys
+import time
+import traceback
+
+
+def expand_parameters_file_paths(patterns):
+    """
+    Expands given patterns into parameters file paths.
+    A pattern can be a file path, a glob pattern or a directory, in which case every yaml file it contains is used.
+    :param patterns: list of strings.
+    :return: list of file paths, without duplicates, in the order of the patterns.
+    """
+    file_paths = []
+    for pattern in patterns:
+        if Path(pattern).is_dir():
+            matches = sorted(glob.glob(str(Path(pattern) / "*.yaml")) + glob.glob(str(Path(pattern) / "*.yml")))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+        if not matches:
+            raise RuntimeError(f"No parameters file matches {pattern}.")
+        file_paths.extend(match for match in matches if match not in file_paths)
+    return file_paths
+
+
+def _process_parameters_file_job(parameters_file_path, profile=False, cprofile=False, web_app=True):
+    start_time = time.perf_counter()
+    profiler = BuildProfiler(cprofile=cprofile) if profile or cprofile else None
+    try:
+        if profiler is None:
+            process_parameters_file(parameters_file_path, web_app=web_app)
+        else:
+            profiler.start()
+            try:
+                process_parameters_file(parameters_file_path, profiler, web_app=web_app)
+            finally:
+                profiler.stop()
+                profiler.save_report(f"{parameters_file_path}.profile.json")
+                if cprofile:
+                    profiler.save_cprofile(f"{parameters_file_path}.prof")
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return {
+        "parameters_file_path": parameters_file_path,
+        "error": error,
+        "duration": time.perf_counter() - start_time
+    }
+
+
+def process_parameters_files(parameters_file_paths, max_workers=None, result_callback=None, profile=False,
+                             cprofile=False, web_app=True):
+    """
+    Builds many plays in parallel, one job per parameters file.
+    A failing job does not abort the others.
+    A single play, or a single worker, is built in the current process.
+    Templates and Brython runtime are loaded before starting the workers, so that they are shared with them when
+    processes are forked, and at most once per worker otherwise.
+    :param parameters_file_paths: list of parameters file paths.
+    :param max_workers: number of processes. Defaults to the number of processors.
+    :param result_callback: function (dict) -> None, called with each job result as soon as it is available.
+    :param profile: if True, the report of a BuildProfiler is written next to each parameters file, with the
+    ".profile.json" suffix.
+    :param cprofile: if True, a cProfile dump is also written next to each parameters file, with the ".prof" suffix.
+    :param web_app: if False, only statistics are computed and saved.
+    :return: list of job results, in the order of parameters files. A job result is a dict with keys
+    "parameters_file_path", "error" (None or the formatted traceback) and "duration" (in seconds).
+    """
+    if web_app:
+        load_web_app_resources()
+
+    results = {}
+
+    def add_result(result):
+        results[result["parameters_file_path"]] = result
+        if result_callback is not None:
+            result_callback(result)
+
+    if len(parameters_file_paths) == 1 or max_workers == 1:
+        for file_path in parameters_file_paths:
+            add_result(_process_parameters_file_job(file_path, profile, cprofile, web_app))
+    else:
+        initializer = load_web_app_resources if web_app else None
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=initializer) as executor:
+            futures = [executor.submit(_process_parameters_file_job, file_path, profile, cprofile, web_app)
+                       for file_path in parameters_file_paths]
+            for future in as_completed(futures):
+                add_result(future.result())
+
+    return [results[file_path] for file_path in parameters_file_paths]
+
+
+def run(args, web_app=True):
+    """
+    Builds the plays given by parsed arguments, see `add_batch_arguments`, and prints the results.
+    :param args: parsed arguments.
+    :param web_app: if False, only statistics are computed and saved.
+    :return: exit status.
+    """
+    def print_result(result):
+        status = "OK" if result["error"] is None else "FAILED"
+        print(f"[{status}] {result['parameters_file_path']} ({result['duration']:.2f}s)", flush=True)
+
+    start_time = time.perf_counter()
+    results = process_parameters_files(
+        expand_parameters_file_paths(args.parameters), max_workers=args.jobs, result_callback=print_result,
+        profile=args.profile, cprofile=args.cprofile, web_app=web_app)
+    failures = [result for result in results if result["error"] is not None]
+    for result in failures:
+        print(f"\n{result['parameters_file_path']} failed:\n{result['error']}", file=sys.stderr)
+    print(f"{len(results) - len(failures)}/{len(results)} plays built in {time.perf_counter() - start_time:.2f}s.")
+
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builds the web apps and statistics of many plays in parallel.")
+    add_batch_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Command line entry point of replicreator.
+Modules are only imported by the commands needing them, so that the command line starts fast.
+"""
+import argparse
+import sys
+
+
+def build(args):
+    from . import batch
+    return batch.run(args)
+
+
+def stats_only(args):
+    from . import batch
+    return batch.run(args, web_app=False)
+
+
+def check(args):
+    from .app import check_parameters_file
+    from .batch import expand_parameters_file_paths
+
+    n_failures = 0
+    for parameters_file_path in expand_parameters_file_paths(args.parameters):
+        try:
+            check_parameters_file(parameters_file_path)
+            print(f"[OK] {parameters_file_path}")
+        except Exception as e:
+            n_failures += 1
+            print(f"[FAILED] {parameters_file_path}: {e}")
+    return 1 if n_failures else 0
+
+
+def watch(args):
+    from . import watch as watch_module
+    return watch_module.run(args)
+
+
+def serve(args):
+    from . import serve as serve_module
+    return serve_module.run(args)
+
+
+def get_version():
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return version("replicreator")
+    except PackageNotFoundError:
+        return "unknown (package is not installed)"
+
+
+class _VersionAction(argparse.Action):
+    """
+    Same as argparse "version" action, but looking the version up only when asked for.
+    """
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None):
+        super().__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print(f"replicreator {get_version()}")
+        parser.exit()
+
+
+def add_batch_arguments(parser):
+    parser.add_argument("parameters", nargs="+",
+                        help="parameters files, glob patterns or directories containing parameters files.")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of worker processes (default: number of processors).")
+    parser.add_argument("--profile", action="store_true",
+                        help="write the wall time, bytes read and written and peak memory of each build stage and "
+                             "each scene next to each parameters file, as JSON ('.profile.json' suffix).")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="also write a cProfile dump of each build next to its parameters file ('.prof' suffix).")
+
+
+def add_watch_arguments(parser):
+    parser.add_argument("parameters", help="parameters file.")
+    parser.add_argument("--poll-interval", type=float, default=0.1,
+                        help="delay between two polls of the watched files, in seconds (default: 0.1).")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="delay without changes to wait for before rebuilding, in seconds (default: 0.3).")
+
+
+def add_serve_arguments(parser):
+    parser.add_argument("parameters", help="parameters file.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000).")
+    parser.add_argument("--poll-interval", type=float, default=0.5,
+                        help="minimum delay between two checks of the parameters file and transcriptions, in seconds "
+                             "(default: 0.5).")
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog="replicreator", description="Web app generator for learning theatrical lines.")
+    parser.add_argument("--version", action=_VersionAction, help="show the version and exit.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="build the web apps and statistics of plays.")
+    add_batch_arguments(build_parser)
+    build_parser.set_defaults(function=build)
+
+    stats_parser = subparsers.add_parser("stats-only", help="only compute and save the statistics of plays.")
+    add_batch_arguments(stats_parser)
+    stats_parser.set_defaults(function=stats_only)
+
+    check_parser = subparsers.add_parser(
+        "check", help="check parameters and transcriptions of plays, without writing anything.")
+    check_parser.add_argument("parameters", nargs="+",
+                              help="parameters files, glob patterns or directories containing parameters files.")
+    check_parser.set_defaults(function=check)
+
+    watch_parser = subparsers.add_parser(
+        "watch", help="build a play, then rebuild it whenever its parameters file or its transcriptions change.")
+    add_watch_arguments(watch_parser)
+    watch_parser.set_defaults(function=watch)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="build the web app of a play in memory and serve it over HTTP, with entity tags and gzip "
+                      "encoding, rebuilding it when its inputs change.")
+    add_serve_arguments(serve_parser)
+    serve_parser.set_defaults(function=serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
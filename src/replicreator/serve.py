@@ -0,0 +1,322 @@
+from .app import (check_parameters, check_transcriptions, create_label2main, embeds_transcription_texts,
+                  generate_web_app, load_parameters_file, load_transcription, load_web_app_resources)
+from .cli import add_serve_arguments
+from .util.build_manifest import BuildManifest, hash_bytes
+from .util.compression import compress
+from .watch import take_snapshot
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import argparse
+import mimetypes
+import re
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.parse
+
+
+# Content types worth compressing.
+_COMPRESSIBLE_CONTENT_TYPES = {"text/html", "text/javascript", "application/javascript", "application/json", "text/css"}
+# Files smaller than that are not compressed, as compression would barely save anything.
+_MIN_COMPRESSED_SIZE = 1024
+# External runtime files are named after the hash of their content, so browsers can keep them forever.
+_IMMUTABLE_FILE_NAME_PATTERN = re.compile(r"brython\.[0-9a-f]{16}\.js")
+
+
+def create_preview_parameters(parameters, folder_path):
+    """
+    :param parameters: validated parameters.
+    :param folder_path: folder in which the web app is built.
+    :return: parameters writing the web app, its data and its external runtime in given folder, so that the folder can
+    be served as is.
+    """
+    web_app_parameters = dict(parameters["output"]["web_app"])
+    web_app_parameters["file_path"] = Path(folder_path) / Path(web_app_parameters["file_path"]).name
+    if "external_runtime" in web_app_parameters:
+        web_app_parameters["external_runtime"] = {"folder_path": Path(folder_path) / "runtime", "base_url": "runtime"}
+    return dict(parameters, output=dict(parameters["output"], web_app=web_app_parameters))
+
+
+def build_web_app(parameters, build_manifest):
+    """
+    Checks parameters and transcriptions, then generates the web app only. Statistics are not saved.
+    :param parameters: validated parameters.
+    :param build_manifest: a BuildManifest.
+    :return:
+    """
+    check_parameters(parameters)
+    label2main = create_label2main(parameters)
+    stage_directions_labels = set(parameters["stage_directions"]["labels"])
+    keep_texts = embeds_transcription_texts(parameters)
+    transcriptions = [load_transcription(scene["file_path"], label2main, stage_directions_labels, keep_texts)
+                      for scene in parameters["scenes"]]
+    check_transcriptions(parameters, transcriptions)
+    generate_web_app(parameters, transcriptions, build_manifest)
+
+
+def load_served_files(folder_path, previous_served_files=None):
+    """
+    Loads the files of a folder in memory, along with what is needed to serve them.
+    Precompressed copies written next to the files are used as their gzip encoded content. Other compressible files
+    are compressed, unless their content did not change since they were previously loaded.
+    :param folder_path:
+    :param previous_served_files: result of the previous call, or None.
+    :return: dict giving, for the URL path of each file, a dict with keys "body", "gzip_body" (None if the file is not
+    compressed), "etag", "content_type" and "immutable".
+    """
+    if previous_served_files is None:
+        previous_served_files = {}
+    folder_path = Path(folder_path)
+    served_files = {}
+    for file_path in sorted(folder_path.rglob("*")):
+        if not file_path.is_file() or file_path.suffix in [".gz", ".br", ".tmp"]:
+            continue
+        url_path = "/" + file_path.relative_to(folder_path).as_posix()
+        body = file_path.read_bytes()
+        etag = f'"{hash_bytes(body)[:32]}"'
+        previous_served_file = previous_served_files.get(url_path)
+        if previous_served_file is not None and previous_served_file["etag"] == etag:
+            served_files[url_path] = previous_served_file
+            continue
+
+        content_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+        gzip_body = None
+        precompressed_file_path = Path(f"{file_path}.gz")
+        if precompressed_file_path.exists():
+            gzip_body = precompressed_file_path.read_bytes()
+        elif content_type in _COMPRESSIBLE_CONTENT_TYPES and len(body) >= _MIN_COMPRESSED_SIZE:
+            gzip_body = compress(body, "gzip")
+        if content_type.startswith("text/") or content_type in _COMPRESSIBLE_CONTENT_TYPES:
+            content_type += "; charset=utf-8"
+        served_files[url_path] = {
+            "body": body,
+            "gzip_body": gzip_body,
+            "etag": etag,
+            "content_type": content_type,
+            "immutable": _IMMUTABLE_FILE_NAME_PATTERN.fullmatch(file_path.name) is not None,
+        }
+    return served_files
+
+
+class PreviewSite:
+    """
+    Web app of a play, built into a private folder and served from memory.
+    Before answering a request, the parameters file and the transcriptions are checked, at most once per poll
+    interval, and the web app is rebuilt only if one of them changed. The build manifest stays in memory, so that
+    unchanged outputs are neither rewritten nor compressed again.
+    """
+
+    def __init__(self, parameters_file_path, folder_path, poll_interval=0.5):
+        self.parameters_file_path = str(parameters_file_path)
+        self.folder_path = Path(folder_path)
+        self.poll_interval = poll_interval
+        self.parameters = None
+        self.app_url_path = None
+        self.build_manifest = BuildManifest()
+        self.served_files = {}
+        self.error = None
+        self.watched_file_paths = [self.parameters_file_path]
+        self.snapshot = None
+        self.last_check_time = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Rebuilds the web app if it was never built or if its inputs changed.
+        :return:
+        """
+        with self.lock:
+            if self.snapshot is not None and time.monotonic() - self.last_check_time < self.poll_interval:
+                return
+            self.last_check_time = time.monotonic()
+            if self.snapshot is None:
+                self.build(self.watched_file_paths)
+                return
+            snapshot = take_snapshot(self.watched_file_paths)
+            changed_file_paths = [
+                file_path for file_path in self.watched_file_paths if snapshot[file_path] != self.snapshot[file_path]]
+            if changed_file_paths:
+                print(f"Changed: {', '.join(changed_file_paths)}", flush=True)
+                self.build(changed_file_paths)
+
+    def build(self, changed_file_paths):
+        start_time = time.perf_counter()
+        try:
+            if self.parameters is None or self.parameters_file_path in changed_file_paths:
+                self.parameters = None
+                self.parameters = create_preview_parameters(
+                    load_parameters_file(self.parameters_file_path), self.folder_path)
+                self.app_url_path = "/" + Path(self.parameters["output"]["web_app"]["file_path"]).name
+                self.watched_file_paths = [self.parameters_file_path] + [
+                    str(scene["file_path"]) for scene in self.parameters["scenes"]]
+            # Taken before the build, so that files changed during the build trigger another build.
+            self.snapshot = take_snapshot(self.watched_file_paths)
+            build_web_app(self.parameters, self.build_manifest)
+            self.served_files = load_served_files(self.folder_path, self.served_files)
+            self.error = None
+            print(f"Built {self.parameters_file_path} in {(time.perf_counter() - start_time) * 1000:.0f} ms.",
+                  flush=True)
+        except Exception:
+            self.snapshot = take_snapshot(self.watched_file_paths)
+            self.error = traceback.format_exc()
+            print(f"Build of {self.parameters_file_path} failed:\n{self.error}", file=sys.stderr, flush=True)
+
+    def get_served_file(self, url_path):
+        """
+        :param url_path: path of a requested URL, "/" standing for the web app.
+        :return: see `load_served_files`, or None if there is no such file.
+        """
+        if url_path == "/":
+            url_path = self.app_url_path
+        return self.served_files.get(url_path)
+
+
+def accepts_gzip(accept_encoding):
+    """
+    :param accept_encoding: value of the Accept-Encoding header, or None.
+    :return: True if gzip is an accepted encoding. An explicit gzip coding takes precedence over "*", whatever their
+    order.
+    """
+    if not accept_encoding:
+        return False
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, _, parameters = coding.strip().partition(";")
+        qualities.setdefault(name.strip().lower(), parameters.strip().lower())
+    quality = qualities.get("gzip", qualities.get("*"))
+    if quality is None:
+        return False
+    if not quality.startswith("q="):
+        return True
+    try:
+        return 0 < float(quality[2:]) <= 1
+    except ValueError:
+        # A malformed quality value is ignored, like the coding it qualifies.
+        return False
+
+
+def matches_etag(if_none_match, etag):
+    """
+    :param if_none_match: value of the If-None-Match header.
+    :param etag:
+    :return: True if one of the entity tags of the header matches etag, with the weak comparison required for
+    If-None-Match.
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the files of the PreviewSite of the server, with strong entity tags, gzip encoding and conditional
+    requests. Files are revalidated at each use, except external runtime files, which are immutable.
+    """
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def serve(self, send_body):
+        site = self.server.site
+        site.refresh()
+        if site.error is not None:
+            self.send_text(HTTPStatus.INTERNAL_SERVER_ERROR, f"Build failed:\n{site.error}", send_body)
+            return
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        served_file = site.get_served_file(url_path)
+        if served_file is None:
+            self.send_text(HTTPStatus.NOT_FOUND, f"{url_path} not found.", send_body)
+            return
+
+        body = served_file["body"]
+        etag = served_file["etag"]
+        content_encoding = None
+        if served_file["gzip_body"] is not None and accepts_gzip(self.headers.get("Accept-Encoding")):
+            body = served_file["gzip_body"]
+            # Each encoding of a file is a different representation, which needs its own strong entity tag.
+            etag = f'{etag[:-1]}-gzip"'
+            content_encoding = "gzip"
+
+        if_none_match = self.headers.get("If-None-Match")
+        not_modified = if_none_match is not None and matches_etag(if_none_match, etag)
+        self.send_response(HTTPStatus.NOT_MODIFIED if not_modified else HTTPStatus.OK)
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if served_file["immutable"]:
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", served_file["content_type"])
+        self.send_header("Content-Length", str(len(body)))
+        if content_encoding is not None:
+            self.send_header("Content-Encoding", content_encoding)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_text(self, status, text, send_body):
+        body = text.encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def serve(parameters_file_path, host="127.0.0.1", port=8000, poll_interval=0.5):
+    """
+    Builds the web app of a play and serves it over HTTP, rebuilding it when its parameters file or one of its
+    transcriptions changes. Serves until interrupted.
+    :param parameters_file_path:
+    :param host: address to listen on.
+    :param port: port to listen on, or 0 for any free port.
+    :param poll_interval: minimum delay between two checks of the inputs, in seconds.
+    :return:
+    """
+    load_web_app_resources()
+    with tempfile.TemporaryDirectory(prefix="replicreator_serve_") as folder_path:
+        site = PreviewSite(parameters_file_path, folder_path, poll_interval=poll_interval)
+        site.refresh()
+        with ThreadingHTTPServer((host, port), PreviewRequestHandler) as server:
+            server.site = site
+            print(f"Serving {parameters_file_path} on http://{host}:{server.server_address[1]}/", flush=True)
+            server.serve_forever()
+
+
+def run(args):
+    """
+    :param args: parsed arguments, see `add_serve_arguments`.
+    :return: exit status.
+    """
+    try:
+        serve(args.parameters, host=args.host, port=args.port, poll_interval=args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Builds the web app of a play in memory and serves it, rebuilding it when its inputs change.")
+    add_serve_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
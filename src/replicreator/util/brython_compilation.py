@@ -0,0 +1,27 @@
+from pathlib import Path
+import shutil
+import subprocess
+
+
+_COMPILER_SCRIPT_FILE_PATH = Path(__file__).parent / "../../../res/brython_compiler.js"
+
+
+def compile_python_to_js(python_script, brython_script_file_path):
+    """
+    Translates a Python script to Javascript with Brython, the way Brython would do in the browser.
+    Brython runs headlessly with Node.js, which must be installed.
+    :param python_script: string
+    :param brython_script_file_path: path of brython.js.
+    :return: the body of the Javascript function executing the script, see `brython_compiler.js`.
+    """
+    node_executable = shutil.which("node")
+    if node_executable is None:
+        raise RuntimeError("Node.js is required to precompile the web app but 'node' executable was not found.")
+
+    result = subprocess.run(
+        [node_executable, str(_COMPILER_SCRIPT_FILE_PATH), str(brython_script_file_path)],
+        input=python_script.encode("utf8"), capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Unable to precompile Python script with Brython:\n{result.stderr.decode('utf8')}")
+
+    return result.stdout.decode("utf8")
@@ -0,0 +1,176 @@
+from .profiling import NoProfiler
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text):
+    return hash_bytes(text.encode("utf8"))
+
+
+def hash_json(data):
+    return hash_text(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str))
+
+
+class BuildManifest:
+    """
+    Records what a build consumed and produced so that the next build can skip unchanged work.
+    Scenes are cached by a key combining the hash of their content and the hash of the parameters and code they depend
+    on. The hash of each scene file is recorded with its size and modification time, so that unchanged files are not
+    read again to be hashed.
+    Outputs are recorded with the hash of their content so that unchanged outputs are not rewritten.
+    If no file path is given, the manifest only lives in memory.
+    Bytes written by the manifest are counted by its profiler, see `BuildProfiler`.
+    """
+
+    FORMAT_VERSION = 4
+
+    def __init__(self, file_path=None):
+        self.file_path = file_path
+        self.scenes = {}
+        self.files = {}
+        self.outputs = {}
+        self._used_scene_keys = set()
+        self._used_file_paths = set()
+        self.profiler = NoProfiler()
+        if file_path is not None:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.file_path, "r", encoding="utf8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("format_version") != self.FORMAT_VERSION:
+            return
+        self.scenes = data["scenes"]
+        self.files = data["files"]
+        self.outputs = data["outputs"]
+
+    def save(self):
+        """
+        Writes the manifest to disk, dropping scenes and files that were not used since it was loaded.
+        :return:
+        """
+        self.scenes = {key: value for key, value in self.scenes.items() if key in self._used_scene_keys}
+        self.files = {key: value for key, value in self.files.items() if key in self._used_file_paths}
+        self._used_scene_keys = set()
+        self._used_file_paths = set()
+        if self.file_path is None:
+            return
+        data = {"format_version": self.FORMAT_VERSION, "scenes": self.scenes, "files": self.files,
+                "outputs": self.outputs}
+        tmp_file_path = f"{self.file_path}.tmp"
+        with open(tmp_file_path, "w", encoding="utf8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            self.profiler.count_bytes_written(f.tell())
+        os.replace(tmp_file_path, self.file_path)
+
+    def get_scene(self, key):
+        """
+        :param key: see `BuildManifest.scene_key`.
+        :return: the cached scene data or None.
+        """
+        scene = self.scenes.get(key)
+        if scene is not None:
+            self._used_scene_keys.add(key)
+        return scene
+
+    def set_scene(self, key, scene):
+        self.scenes[key] = scene
+        self._used_scene_keys.add(key)
+
+    def get_file_hash(self, file_path, file_stat):
+        """
+        :param file_path:
+        :param file_stat: current `os.stat` result of the file.
+        :return: the hash recorded for the file, or None if none was recorded for its current size and modification
+        time.
+        """
+        key = str(file_path)
+        entry = self.files.get(key)
+        if entry is None or entry[:2] != [file_stat.st_size, file_stat.st_mtime_ns]:
+            return None
+        self._used_file_paths.add(key)
+        return entry[2]
+
+    def set_file_hash(self, file_path, file_stat, content_hash):
+        """
+        :param file_path:
+        :param file_stat: `os.stat` result of the file, taken before its content was read.
+        :param content_hash:
+        :return:
+        """
+        key = str(file_path)
+        self.files[key] = [file_stat.st_size, file_stat.st_mtime_ns, content_hash]
+        self._used_file_paths.add(key)
+
+    @staticmethod
+    def scene_key(scene_hash, dependencies_hash):
+        """
+        :param scene_hash: hash of the content of the scene, see `hash_text`.
+        :param dependencies_hash: hash of the parameters and code the parsed scene depends on.
+        :return:
+        """
+        return scene_hash + dependencies_hash
+
+    def is_output_up_to_date(self, file_path, content_hash):
+        return self.outputs.get(str(file_path)) == content_hash and Path(file_path).exists()
+
+    def record_output(self, file_path, content_hash):
+        """
+        Records an output written by other means than the manifest, such as a database.
+        :param file_path:
+        :param content_hash: hash identifying what was written, see `is_output_up_to_date`.
+        :return:
+        """
+        self.outputs[str(file_path)] = content_hash
+
+    def write_output(self, file_path, content, content_hash=None, newline=None):
+        """
+        Writes content to given file, unless the previous build already wrote the very same content there.
+        :param file_path:
+        :param content: string, or bytes written as is.
+        :param content_hash: hash identifying the content. Computed from content if None.
+        :param newline: see builtin `open`. Ignored for bytes.
+        :return: True if the file was written.
+        """
+        is_binary = isinstance(content, bytes)
+        if content_hash is None:
+            content_hash = hash_bytes(content) if is_binary else hash_text(content)
+        if self.is_output_up_to_date(file_path, content_hash):
+            return False
+        if is_binary:
+            with open(file_path, "wb") as f:
+                f.write(content)
+                self.profiler.count_bytes_written(f.tell())
+        else:
+            with open(file_path, "w", encoding="utf8", newline=newline) as f:
+                f.write(content)
+                self.profiler.count_bytes_written(f.tell())
+        self.outputs[str(file_path)] = content_hash
+        return True
+
+    def replace_output(self, file_path, tmp_file_path, content_hash):
+        """
+        Moves a file already written elsewhere, for instance streamed to a temporary file, to given output path, unless
+        the previous build already wrote the very same content there, in which case the file is removed.
+        :param file_path:
+        :param tmp_file_path: path of the written file, on the same file system as file_path.
+        :param content_hash: hash identifying the content.
+        :return: True if the output was replaced.
+        """
+        if self.is_output_up_to_date(file_path, content_hash):
+            os.remove(tmp_file_path)
+            return False
+        self.profiler.count_bytes_written(os.path.getsize(tmp_file_path))
+        os.replace(tmp_file_path, file_path)
+        self.outputs[str(file_path)] = content_hash
+        return True
@@ -0,0 +1,60 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is an optional dependency
+    brotli = None
+
+
+# Extension of the precompressed file written for each supported encoding.
+ENCODING_EXTENSIONS = {"gzip": ".gz", "br": ".br"}
+
+
+def available_encodings():
+    """
+    :return: the encodings that can be produced, "br" requiring the brotli package.
+    """
+    return ["gzip"] if brotli is None else ["gzip", "br"]
+
+
+def compress(data, encoding):
+    """
+    Compresses data with the highest compression level, deterministically.
+    :param data: bytes
+    :param encoding: "gzip" or "br"
+    :return: compressed bytes.
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br":
+        if brotli is None:
+            raise RuntimeError("brotli package is required to compress with brotli.")
+        return brotli.compress(data)
+    raise RuntimeError(f"Unknown encoding {encoding}.")
+
+
+def compress_file(source_file_path, target_file_path, encoding, chunk_size=1 << 20):
+    """
+    Compresses a file chunk by chunk, the way `compress` compresses data, without reading the whole file in memory.
+    :param source_file_path:
+    :param target_file_path:
+    :param encoding: "gzip" or "br"
+    :param chunk_size: number of bytes read at once.
+    :return:
+    """
+    if encoding == "gzip":
+        with open(source_file_path, "rb") as source, open(target_file_path, "wb") as target:
+            with gzip.GzipFile(filename="", mode="wb", fileobj=target, compresslevel=9, mtime=0) as compressed_target:
+                while chunk := source.read(chunk_size):
+                    compressed_target.write(chunk)
+        return
+    if encoding == "br":
+        if brotli is None:
+            raise RuntimeError("brotli package is required to compress with brotli.")
+        compressor = brotli.Compressor()
+        with open(source_file_path, "rb") as source, open(target_file_path, "wb") as target:
+            while chunk := source.read(chunk_size):
+                target.write(compressor.process(chunk))
+            target.write(compressor.finish())
+        return
+    raise RuntimeError(f"Unknown encoding {encoding}.")
@@ -0,0 +1,37 @@
+# This module is also embedded in the web app script, which Brython runs without its standard library: it must not
+# import anything.
+
+
+def split_inline_stage_directions(line):
+    """
+    Splits a line into spans of text and inline stage directions, in a single scan.
+    An inline stage direction starts with "(" and ends with the first following ")", both included. If there is no
+    such ")", the stage direction runs to the end of the line.
+    :param line: string
+    :return: list of pairs (text, is_stage_direction), which concatenated texts give back the line.
+    """
+    spans = []
+    position = 0
+    length = len(line)
+    while position < length:
+        begin = line.find("(", position)
+        if begin == -1:
+            begin = length
+        if begin > position:
+            spans.append((line[position:begin], False))
+        if begin < length:
+            end = line.find(")", begin)
+            end = length if end == -1 else end + 1
+            spans.append((line[begin:end], True))
+        else:
+            end = length
+        position = end
+    return spans
+
+
+def remove_inline_stage_directions(line):
+    """
+    :param line: string
+    :return: the line without its inline stage directions, see `split_inline_stage_directions`.
+    """
+    return "".join([text for text, is_stage_direction in split_inline_stage_directions(line) if not is_stage_direction])
@@ -0,0 +1,74 @@
+# This module is also embedded in the web app script, which Brython runs without its standard library: it must not
+# import anything.
+
+
+# inspired from https://stackoverflow.com/questions/3062746/special-simple-random-number-generator
+# State of the generator, which the web app sets from the base scores before a random rehearsal.
+seed = 0
+
+
+def randint(n):
+    global seed
+    seed = (1103515245 * seed + 12345) % 2**31
+    return seed % n
+
+
+def bisect_left(sorted_list, value):
+    # Same as bisect.bisect_left, as the bisect module is not available in the web app.
+    low = 0
+    high = len(sorted_list)
+    while low < high:
+        middle = (low + high) // 2
+        if sorted_list[middle] < value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class LineScheduler:
+    """
+    Keeps line indexes in buckets of lines having the same score, so that one of the worst scored lines can be chosen
+    without scanning every line.
+    Scores are (perfect, almost, ko) tuples, compared in lexicographic order. Buckets are sorted by score, and line
+    indexes are sorted in each bucket.
+    """
+    def __init__(self, scores):
+        self.scores = list(scores)
+        self.buckets = {}
+        for index, score in enumerate(self.scores):
+            if score not in self.buckets:
+                self.buckets[score] = []
+            self.buckets[score].append(index)
+        self.sorted_scores = sorted(self.buckets)
+
+    def choose(self, excluded_index):
+        # Same choice as a scan of every line but the excluded one: ties are broken by randint among the indexes of
+        # the worst scored lines, in ascending order.
+        for score in self.sorted_scores:
+            bucket = self.buckets[score]
+            excluded_position = len(bucket) if excluded_index is None else bisect_left(bucket, excluded_index)
+            has_excluded_index = excluded_position < len(bucket) and bucket[excluded_position] == excluded_index
+            n_candidates = len(bucket) - 1 if has_excluded_index else len(bucket)
+            if n_candidates > 0:
+                position = randint(n_candidates)
+                if has_excluded_index and position >= excluded_position:
+                    position += 1
+                return bucket[position]
+        return None
+
+    def update(self, index, score):
+        old_score = self.scores[index]
+        old_bucket = self.buckets[old_score]
+        old_bucket.pop(bisect_left(old_bucket, index))
+        if not old_bucket:
+            del self.buckets[old_score]
+            self.sorted_scores.pop(bisect_left(self.sorted_scores, old_score))
+
+        self.scores[index] = score
+        if score in self.buckets:
+            bucket = self.buckets[score]
+            bucket.insert(bisect_left(bucket, index), index)
+        else:
+            self.buckets[score] = [index]
+            self.sorted_scores.insert(bisect_left(self.sorted_scores, score), score)
@@ -0,0 +1,168 @@
+import io
+import re
+import tokenize
+
+
+_JS_CODE_PATTERN = re.compile(r"""["'`/\n]""")
+# Patterns finding, inside a literal opened by given character, an escape sequence, the end of the literal or a new
+# line. Brackets of regular expressions are skipped, as "/" does not end a regular expression inside them.
+_JS_LITERAL_END_PATTERNS = {
+    '"': re.compile(r'\\[\s\S]|["\n]'),
+    "'": re.compile(r"\\[\s\S]|['\n]"),
+    "`": re.compile(r"\\[\s\S]|[`\n]"),
+    "/": re.compile(r"\\[\s\S]|\[(?:\\.|[^\]\\\n])*\]|[/\n]"),
+}
+_JS_REGEX_PRECEDING_CHARACTERS = set("(,=:[!&|?{};+-*%<>~^")
+_JS_REGEX_PRECEDING_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "delete", "void", "throw", "new",
+                                "instanceof", "yield", "await"}
+_JS_WORD_PATTERN = re.compile(r"[\w$]+$")
+
+
+def _is_js_regex_start(script, index):
+    """
+    :param script:
+    :param index: index of a "/" which does not start a comment.
+    :return: True if the "/" starts a regular expression rather than being a division, guessed from what precedes it.
+    """
+    preceding = script[max(0, index - 64):index].rstrip()
+    if not preceding or preceding[-1] in _JS_REGEX_PRECEDING_CHARACTERS:
+        return True
+    word = _JS_WORD_PATTERN.search(preceding)
+    return word is not None and word[0] in _JS_REGEX_PRECEDING_KEYWORDS
+
+
+def _get_js_line_states(script):
+    """
+    Scans a Javascript script for its strings, template literals, regular expressions and comments.
+    Template literal substitutions ("${...}") are expected not to contain template literals themselves.
+    :param script: string
+    :return: list giving, for each line of the script, what it starts in: "code", "comment" for a multi-line comment,
+    or "literal" for a template literal or a string continued with a backslash.
+    """
+    line_states = ["code"]
+    position = 0
+    while True:
+        match = _JS_CODE_PATTERN.search(script, position)
+        if match is None:
+            return line_states
+        character = match[0]
+        position = match.end()
+        if character == "\n":
+            line_states.append("code")
+        elif character == "/" and script.startswith("/", position):
+            end = script.find("\n", position)
+            position = len(script) if end == -1 else end
+        elif character == "/" and script.startswith("*", position):
+            end = script.find("*/", position + 1)
+            end = len(script) if end == -1 else end + 2
+            line_states.extend(["comment"] * script.count("\n", position, end))
+            position = end
+        elif character != "/" or _is_js_regex_start(script, match.start()):
+            end_pattern = _JS_LITERAL_END_PATTERNS[character]
+            while True:
+                end_match = end_pattern.search(script, position)
+                if end_match is None:
+                    return line_states
+                position = end_match.end()
+                token = end_match[0]
+                if token == character:
+                    break
+                if token == "\n":
+                    if character != "`":
+                        # Unterminated string or regular expression, or a division taken for one.
+                        line_states.append("code")
+                        break
+                    line_states.append("literal")
+                elif token.endswith("\n"):
+                    line_states.append("literal")
+
+
+def minify_js(script):
+    """
+    Removes indentation, trailing whitespace, blank lines and full-line comments from a Javascript script.
+    This is conservative: lines are never joined, so automatic semicolon insertion is not affected, and the content of
+    strings, template literals and regular expressions is left untouched.
+    It is worth it on scripts generated by Brython, which it reduces by a sixth, but not on the Brython runtime, which
+    is already minified.
+    :param script: string
+    :return: the minified script.
+    """
+    line_states = _get_js_line_states(script)
+    minified_lines = []
+    for line_index, line in enumerate(script.split("\n")):
+        start_state = line_states[line_index]
+        end_state = line_states[line_index + 1] if line_index + 1 < len(line_states) else "code"
+        if start_state == "literal":
+            minified_lines.append(line if end_state == "literal" else line.rstrip())
+            continue
+        line = line.strip() if end_state != "literal" else line.lstrip()
+        if line and not (start_state == "code" and line.startswith("//")):
+            minified_lines.append(line)
+    return "\n".join(minified_lines)
+
+
+_CSS_STRING_OR_COMMENT_PATTERN = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.DOTALL)
+_CSS_STRING_PLACEHOLDER_PATTERN = re.compile(r"\x00(\d+)\x00")
+_CSS_WHITESPACE_PATTERN = re.compile(r"\s+")
+# Whitespace before ":" is kept, as it separates a descendant pseudo-class from its ancestor, as in "div :first-child".
+_CSS_SEPARATOR_PATTERN = re.compile(r"\s*([{};,>])\s*|:\s+")
+
+
+def minify_css(style):
+    """
+    Removes comments and unnecessary whitespace from a CSS style sheet. Strings are left untouched.
+    :param style: string
+    :return: the minified style sheet.
+    """
+    strings = []
+
+    def replace_string_or_comment(match):
+        if match[1] is None:
+            return " "
+        strings.append(match[1])
+        return f"\x00{len(strings) - 1}\x00"
+
+    style = _CSS_STRING_OR_COMMENT_PATTERN.sub(replace_string_or_comment, style)
+    style = _CSS_WHITESPACE_PATTERN.sub(" ", style)
+    style = _CSS_SEPARATOR_PATTERN.sub(lambda match: match[1] or ":", style)
+    style = style.replace(";}", "}").strip()
+    return _CSS_STRING_PLACEHOLDER_PATTERN.sub(lambda match: strings[int(match[1])], style)
+
+
+def minify_python(script):
+    """
+    Removes comments and blank lines from a Python script.
+    Strings, including multi-line ones, are left untouched.
+    :param script: string
+    :return: the minified script.
+    """
+    lines = script.split("\n")
+    # Lines which are part of a multi-line token must not be removed, even if they look blank.
+    protected_line_indexes = set()
+    comments = []
+    for token in tokenize.generate_tokens(io.StringIO(script).readline):
+        if token.type == tokenize.COMMENT:
+            comments.append(token)
+        elif token.start[0] != token.end[0]:
+            protected_line_indexes.update(range(token.start[0], token.end[0]))
+
+    for comment in reversed(comments):
+        line_index = comment.start[0] - 1
+        line = lines[line_index]
+        lines[line_index] = line[:comment.start[1]].rstrip() + line[comment.end[1]:]
+
+    return "\n".join(
+        line for line_index, line in enumerate(lines)
+        if line.strip() or line_index in protected_line_indexes)
+
+
+_HTML_STYLE_PATTERN = re.compile(r"(<style>)(.*?)(</style>)", re.DOTALL)
+
+
+def minify_html_styles(page):
+    """
+    Minifies the content of every style element of an HTML page, see `minify_css`.
+    :param page: string
+    :return: the page with minified style sheets.
+    """
+    return _HTML_STYLE_PATTERN.sub(lambda match: match[1] + minify_css(match[2]) + match[3], page)
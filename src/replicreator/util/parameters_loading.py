@@ -1,9 +1,17 @@
 import cerberus
 
 import yaml
+import copy
+import hashlib
+import json
 import os
 from pathlib import Path
 
+try:
+    _YamlLoader = yaml.CSafeLoader
+except AttributeError:  # PyYAML was built without libyaml
+    _YamlLoader = yaml.SafeLoader
+
 
 class CustomValidator(cerberus.Validator):
     types_mapping = cerberus.Validator.types_mapping.copy()
@@ -23,6 +31,31 @@ class CustomValidator(cerberus.Validator):
         return Path(value)
 
 
+# Compiled schemas, by schema id, with the schema to check that the id was not reused, and its fingerprint.
+_compiled_schemas = {}
+
+# Validated parameters, by hash of the parameters file, schema fingerprint and base path.
+_validated_parameters_cache = {}
+_VALIDATED_PARAMETERS_CACHE_MAX_SIZE = 64
+
+# Version of the files of the persistent cache of validated parameters, see `load_parameters_yaml`.
+_PERSISTENT_CACHE_FORMAT_VERSION = 1
+
+
+def _compile_schema(schema):
+    """
+    :param schema: a cerberus-like schema, see `validate_parameters`.
+    :return: a pair (compiled schema, fingerprint of the schema), the schema being compiled only once.
+    """
+    entry = _compiled_schemas.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        compiled_schema = CustomValidator(base_path=".", schema={'root': schema}, require_all=True).schema
+        fingerprint = hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode("utf8")).hexdigest()
+        entry = (schema, compiled_schema, fingerprint)
+        _compiled_schemas[id(schema)] = entry
+    return entry[1], entry[2]
+
+
 def validate_parameters(raw_parameters, schema, base_path="."):
     """
     Validate parameters using given cerberus-like schema.
@@ -33,9 +66,10 @@ def validate_parameters(raw_parameters, schema, base_path="."):
     :param base_path: base path used for normalizing path.
     :return: the validated parameters
     """
-    schema_with_root = {'root': schema}
     raw_parameters_with_root = {'root': raw_parameters}
-    parameters_validator = CustomValidator(base_path=base_path, schema=schema_with_root, require_all=True)
+    compiled_schema, _ = _compile_schema(schema)
+    # Validators given a compiled schema do not check it again, so they are cheap to build.
+    parameters_validator = CustomValidator(base_path=base_path, schema=compiled_schema, require_all=True)
     if parameters_validator.validate(raw_parameters_with_root):
         validated_parameters = parameters_validator.document["root"]
     else:
@@ -48,18 +82,119 @@ def load_parameters_yaml(parameters_file_path, schema):
     """
     Load and check parameters from given yaml file.
     Check this for the schema https://docs.python-cerberus.org
+    Validated parameters are cached, in memory and in a file of the user cache folder (see `get_cache_folder_path`):
+    loading again a file whose content did not change, with the same schema, neither parses nor validates it again,
+    even from another process.
     :param parameters_file_path:
     :param schema: a cerberus schema describing parameters data.
-    :return: validated parameters
+    :return: validated parameters, which the caller is free to modify.
     """
-    # Load yaml file and validate it
-    with open(parameters_file_path, 'r', encoding="utf8") as f:
-        raw_parameters = yaml.load(f.read(), Loader=yaml.SafeLoader)
+    with open(parameters_file_path, 'rb') as f:
+        parameters_file_content = f.read()
+    base_path = os.path.dirname(parameters_file_path)
+    _, schema_fingerprint = _compile_schema(schema)
+    cache_key = (hashlib.sha256(parameters_file_content).hexdigest(), schema_fingerprint, base_path)
+    validated_parameters = _validated_parameters_cache.get(cache_key)
+    if validated_parameters is None:
+        validated_parameters = _load_persistent_cache(parameters_file_path, cache_key)
+
+    if validated_parameters is None:
+        # Load yaml file and validate it
+        raw_parameters = yaml.load(parameters_file_content.decode("utf8"), Loader=_YamlLoader)
+
+        try:
+            validated_parameters = validate_parameters(raw_parameters, schema, base_path=base_path)
+        except RuntimeError as e:
+            raise RuntimeError(f"Unable to validate parameters from file {parameters_file_path}\n{e}")
+        _save_persistent_cache(parameters_file_path, cache_key, validated_parameters)
+
+    if cache_key not in _validated_parameters_cache:
+        if len(_validated_parameters_cache) >= _VALIDATED_PARAMETERS_CACHE_MAX_SIZE:
+            del _validated_parameters_cache[next(iter(_validated_parameters_cache))]
+        _validated_parameters_cache[cache_key] = validated_parameters
+
+    return copy.deepcopy(validated_parameters)
+
+
+def get_cache_folder_path():
+    """
+    :return: folder of the files of the persistent cache of validated parameters: "replicreator" in the user cache
+    folder, given by XDG_CACHE_HOME, or "~/.cache" if it is not set.
+    """
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "replicreator" / "parameters"
+
+
+def _get_persistent_cache_file_path(parameters_file_path):
+    # A single file per parameters file, so that the cache does not grow when parameters change.
+    path_hash = hashlib.sha256(os.path.abspath(parameters_file_path).encode("utf8")).hexdigest()
+    return get_cache_folder_path() / f"{path_hash[:32]}.json"
 
+
+def _encode_parameters(value):
+    """
+    :param value: validated parameters.
+    :return: the same, as JSON data, paths being encoded as {"__path__": string}.
+    """
+    if isinstance(value, dict):
+        return {key: _encode_parameters(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_encode_parameters(item) for item in value]
+    if isinstance(value, Path):
+        return {"__path__": str(value)}
+    return value
+
+
+def _decode_parameters(value):
+    """
+    :param value: see `_encode_parameters`.
+    :return: the validated parameters.
+    """
+    if isinstance(value, dict):
+        if len(value) == 1 and "__path__" in value:
+            return Path(value["__path__"])
+        return {key: _decode_parameters(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_parameters(item) for item in value]
+    return value
+
+
+def _load_persistent_cache(parameters_file_path, cache_key):
+    """
+    :param parameters_file_path:
+    :param cache_key: see `load_parameters_yaml`.
+    :return: the validated parameters cached for given key, or None.
+    """
     try:
-        validated_parameters = validate_parameters(
-            raw_parameters, schema, base_path=os.path.dirname(parameters_file_path))
-    except RuntimeError as e:
-        raise RuntimeError(f"Unable to validate parameters from file {parameters_file_path}\n{e}")
+        with open(_get_persistent_cache_file_path(parameters_file_path), "r", encoding="utf8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("format_version") != _PERSISTENT_CACHE_FORMAT_VERSION or data.get("key") != list(cache_key):
+        return None
+    return _decode_parameters(data["parameters"])
 
-    return validated_parameters
+
+def _save_persistent_cache(parameters_file_path, cache_key, validated_parameters):
+    """
+    Writes validated parameters in the persistent cache. The cache is only an optimization: errors are ignored.
+    :param parameters_file_path:
+    :param cache_key: see `load_parameters_yaml`.
+    :param validated_parameters:
+    :return:
+    """
+    data = {
+        "format_version": _PERSISTENT_CACHE_FORMAT_VERSION,
+        "key": list(cache_key),
+        "parameters": _encode_parameters(validated_parameters)
+    }
+    file_path = _get_persistent_cache_file_path(parameters_file_path)
+    # Named after the process, so that parallel builds do not write the same temporary file.
+    tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file_path, "w", encoding="utf8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file_path, file_path)
+    except OSError:
+        if os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
@@ -0,0 +1,123 @@
+# cProfile and tracemalloc are only imported by BuildProfiler, as builds which are not profiled only need NoProfiler.
+import contextlib
+import json
+import time
+
+
+class BuildProfiler:
+    """
+    Records the wall time, the bytes read and written and the peak memory of each stage of a build.
+    Stages can be nested, for instance to record each scene within a stage: bytes read and written in a stage are
+    also counted in the stages containing it.
+    Peak memory is the peak, during the stage, of the memory allocated by Python since the profiler started and not
+    freed yet, as traced by tracemalloc, which slows the build down while the profiler is running.
+    A cProfile profile of the whole run can also be recorded.
+    """
+
+    def __init__(self, cprofile=False):
+        self.records = []
+        if cprofile:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+        else:
+            self.cprofile = None
+        self._open_records = []
+        self._start_time = None
+        self._duration = None
+
+    def start(self):
+        import tracemalloc
+        tracemalloc.start()
+        self._start_time = time.perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self._duration = time.perf_counter() - self._start_time
+        import tracemalloc
+        tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def stage(self, name, scene=None):
+        """
+        Context manager recording a stage.
+        :param name: name of the stage.
+        :param scene: name of the scene the stage is about, if any.
+        :return:
+        """
+        record = {"stage": name}
+        if scene is not None:
+            record["scene"] = scene
+        record.update({"seconds": None, "bytes_read": 0, "bytes_written": 0, "peak_memory_bytes": None})
+        self.records.append(record)
+
+        # The peak memory of enclosing stages must survive the reset of the peak for this stage.
+        if self._open_records:
+            self._open_records[-1]["peak_memory_bytes"] = self._get_peak_memory(self._open_records[-1])
+        import tracemalloc
+        # tracemalloc.reset_peak is only available since Python 3.9. Before, peaks are the peaks since the profiler
+        # started.
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self._open_records.append(record)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["seconds"] = time.perf_counter() - start_time
+            record["peak_memory_bytes"] = self._get_peak_memory(record)
+            self._open_records.pop()
+            if self._open_records:
+                parent_record = self._open_records[-1]
+                parent_record["peak_memory_bytes"] = max(
+                    parent_record["peak_memory_bytes"] or 0, record["peak_memory_bytes"])
+
+    @staticmethod
+    def _get_peak_memory(record):
+        import tracemalloc
+        return max(record["peak_memory_bytes"] or 0, tracemalloc.get_traced_memory()[1])
+
+    def count_bytes_read(self, n_bytes):
+        for record in self._open_records:
+            record["bytes_read"] += n_bytes
+
+    def count_bytes_written(self, n_bytes):
+        for record in self._open_records:
+            record["bytes_written"] += n_bytes
+
+    def get_report(self):
+        """
+        :return: a dict with the duration of the whole run under "seconds", and the list of the records of stages,
+        in the order they started, under "stages".
+        """
+        return {"seconds": self._duration, "stages": self.records}
+
+    def save_report(self, file_path):
+        with open(file_path, "w", encoding="utf8") as f:
+            json.dump(self.get_report(), f, ensure_ascii=False, indent=4)
+
+    def save_cprofile(self, file_path):
+        """
+        Writes the cProfile profile, which can be read with `pstats` or tools like snakeviz.
+        :param file_path:
+        :return:
+        """
+        self.cprofile.dump_stats(file_path)
+
+
+class NoProfiler:
+    """
+    Profiler doing nothing, used when a build is not profiled.
+    """
+
+    @contextlib.contextmanager
+    def stage(self, name, scene=None):
+        yield
+
+    def count_bytes_read(self, n_bytes):
+        pass
+
+    def count_bytes_written(self, n_bytes):
+        pass
@@ -0,0 +1,144 @@
+from .inline_stage_directions import remove_inline_stage_directions
+from .statistics_matrix import count_words
+
+import sqlite3
+
+
+_SCHEMA = """
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS plays (
+    play_id INTEGER PRIMARY KEY,
+    play_name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    UNIQUE (play_name, version)
+);
+
+CREATE TABLE IF NOT EXISTS scenes (
+    play_id INTEGER NOT NULL REFERENCES plays (play_id) ON DELETE CASCADE,
+    scene_index INTEGER NOT NULL,
+    menu_name TEXT NOT NULL,
+    PRIMARY KEY (play_id, scene_index)
+);
+
+CREATE TABLE IF NOT EXISTS characters (
+    play_id INTEGER NOT NULL REFERENCES plays (play_id) ON DELETE CASCADE,
+    character_index INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    PRIMARY KEY (play_id, character_index)
+);
+CREATE INDEX IF NOT EXISTS characters_label ON characters (label);
+
+CREATE TABLE IF NOT EXISTS scene_statistics (
+    play_id INTEGER NOT NULL REFERENCES plays (play_id) ON DELETE CASCADE,
+    scene_index INTEGER NOT NULL,
+    character_index INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    alphanum_chars INTEGER NOT NULL,
+    PRIMARY KEY (play_id, scene_index, character_index)
+);
+CREATE INDEX IF NOT EXISTS scene_statistics_character ON scene_statistics (play_id, character_index);
+
+CREATE TABLE IF NOT EXISTS blocks (
+    play_id INTEGER NOT NULL REFERENCES plays (play_id) ON DELETE CASCADE,
+    scene_index INTEGER NOT NULL,
+    block_index INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    characters_line TEXT NOT NULL,
+    is_stage_direction INTEGER NOT NULL,
+    PRIMARY KEY (play_id, scene_index, block_index)
+);
+
+CREATE TABLE IF NOT EXISTS block_characters (
+    play_id INTEGER NOT NULL REFERENCES plays (play_id) ON DELETE CASCADE,
+    scene_index INTEGER NOT NULL,
+    block_index INTEGER NOT NULL,
+    character_index INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS block_characters_block ON block_characters (play_id, scene_index, block_index);
+CREATE INDEX IF NOT EXISTS block_characters_character ON block_characters (play_id, character_index);
+
+CREATE TABLE IF NOT EXISTS lines (
+    play_id INTEGER NOT NULL REFERENCES plays (play_id) ON DELETE CASCADE,
+    scene_index INTEGER NOT NULL,
+    block_index INTEGER NOT NULL,
+    line_index INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    clean_text TEXT NOT NULL,
+    words INTEGER NOT NULL,
+    alphanum_chars INTEGER NOT NULL,
+    PRIMARY KEY (play_id, scene_index, block_index, line_index)
+);
+"""
+
+
+def write_statistics_database(database_file_path, play_name, version, scene_names, transcriptions, statistics):
+    """
+    Writes the statistics of a play into a SQLite database, which can hold the statistics of many plays.
+    The rows of a previous export of the same play and version are replaced, in the same transaction as the inserts.
+    Tables are:
+    - "plays": a row per play and version.
+    - "scenes" and "characters": scenes and main character labels of each play, with their index.
+    - "scene_statistics": the statistics of each character in each scene, see `StatisticsMatrix`.
+    - "blocks": the blocks of each scene, with the main characters speaking in "block_characters".
+    - "lines": the lines of each block, with their metrics.
+    :param database_file_path: path of the database, created if it does not exist.
+    :param play_name:
+    :param version:
+    :param scene_names: list of scene names.
+    :param transcriptions: list of parsed transcriptions, see `parse_transcription`.
+    :param statistics: a StatisticsMatrix with a scene per transcription.
+    :return:
+    """
+    character_indexes = {label: i for i, label in enumerate(statistics.character_labels)}
+
+    scene_statistics_rows = []
+    n_metrics = len(statistics.metrics)
+    for scene_index in range(statistics.n_scenes):
+        scene_values = statistics.get_scene_values(scene_index)
+        for character_index in range(len(statistics.character_labels)):
+            character_values = dict(zip(
+                statistics.metrics, scene_values[character_index * n_metrics:(character_index + 1) * n_metrics]))
+            scene_statistics_rows.append((scene_index, character_index, character_values["lines"],
+                                          character_values["words"], character_values["alphanum_chars"]))
+
+    block_rows = []
+    block_character_rows = []
+    line_rows = []
+    for scene_index, transcription in enumerate(transcriptions):
+        for block_index, block in enumerate(transcription["blocks"]):
+            block_rows.append((scene_index, block_index, block["offset"], block["characters_line"],
+                               block["is_stage_direction"]))
+            block_character_rows.extend(
+                (scene_index, block_index, character_indexes[main_character])
+                for main_character in block["main_characters"] if main_character is not None)
+            for line_index, line in enumerate(block["lines"]):
+                clean_line = remove_inline_stage_directions(line)
+                line_rows.append((scene_index, block_index, line_index, line, clean_line) + count_words(clean_line))
+
+    connection = sqlite3.connect(database_file_path)
+    try:
+        connection.executescript(_SCHEMA)
+        with connection:
+            connection.execute("DELETE FROM plays WHERE play_name = ? AND version = ?", (play_name, version))
+            play_id = connection.execute(
+                "INSERT INTO plays (play_name, version) VALUES (?, ?)", (play_name, version)).lastrowid
+            connection.executemany(
+                "INSERT INTO scenes VALUES (?, ?, ?)",
+                ((play_id, scene_index, scene_name) for scene_index, scene_name in enumerate(scene_names)))
+            connection.executemany(
+                "INSERT INTO characters VALUES (?, ?, ?)",
+                ((play_id, character_index, label)
+                 for character_index, label in enumerate(statistics.character_labels)))
+            connection.executemany(
+                "INSERT INTO scene_statistics VALUES (?, ?, ?, ?, ?, ?)",
+                ((play_id,) + row for row in scene_statistics_rows))
+            connection.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?)",
+                                   ((play_id,) + row for row in block_rows))
+            connection.executemany("INSERT INTO block_characters VALUES (?, ?, ?, ?)",
+                                   ((play_id,) + row for row in block_character_rows))
+            connection.executemany("INSERT INTO lines VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                   ((play_id,) + row for row in line_rows))
+    finally:
+        connection.close()
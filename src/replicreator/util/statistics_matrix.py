@@ -0,0 +1,70 @@
+from array import array
+import re
+
+
+STATISTICS_METRICS = ["lines", "words", "alphanum_chars"]
+
+# Words are maximal runs of alphanumeric characters: [^\W_] matches exactly the characters for which str.isalnum is
+# True.
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def count_words(text):
+    """
+    :param text: string, possibly made of many lines.
+    :return: a pair (number of words, number of alphanumeric characters).
+    """
+    words = _WORD_PATTERN.findall(text)
+    return len(words), len("".join(words))
+
+
+class StatisticsMatrix:
+    """
+    Dense matrix of statistics indexed by (scene, character, metric), stored in a flat array of integers.
+    The values of a scene are contiguous, so that they can be computed, cached and restored as a whole.
+    """
+
+    def __init__(self, n_scenes, character_labels, metrics=None):
+        self.character_labels = list(character_labels)
+        self.metrics = list(STATISTICS_METRICS if metrics is None else metrics)
+        self.n_scenes = n_scenes
+        self.scene_size = len(self.character_labels) * len(self.metrics)
+        self.values = array("q", bytes(array("q").itemsize * n_scenes * self.scene_size))
+
+    def index(self, scene_index, character_index, metric_index):
+        return (scene_index * len(self.character_labels) + character_index) * len(self.metrics) + metric_index
+
+    def get(self, scene_index, character_label, metric):
+        return self.values[self.index(
+            scene_index, self.character_labels.index(character_label), self.metrics.index(metric))]
+
+    def get_scene_values(self, scene_index):
+        """
+        :param scene_index:
+        :return: list of the values of given scene, ordered by character then metric.
+        """
+        start = scene_index * self.scene_size
+        return self.values[start:start + self.scene_size].tolist()
+
+    def set_scene_values(self, scene_index, scene_values):
+        """
+        :param scene_index:
+        :param scene_values: sequence of integers, see `StatisticsMatrix.get_scene_values`.
+        :return:
+        """
+        if len(scene_values) != self.scene_size:
+            raise RuntimeError(f"Expected {self.scene_size} statistics values for scene {scene_index}, "
+                               f"got {len(scene_values)}.")
+        start = scene_index * self.scene_size
+        self.values[start:start + self.scene_size] = array("q", scene_values)
+
+    def metric_rows(self, metric):
+        """
+        :param metric: name of a metric.
+        :return: list with, for each scene, the list of the values of given metric for each character.
+        """
+        metric_index = self.metrics.index(metric)
+        n_metrics = len(self.metrics)
+        return [
+            self.values[start + metric_index:start + self.scene_size:n_metrics].tolist()
+            for start in (scene_index * self.scene_size for scene_index in range(self.n_scenes))]
@@ -0,0 +1,68 @@
+import hashlib
+import re
+
+
+# Placeholders are "##NAME##", or "<!--##NAME##-->" so that HTML templates stay valid HTML.
+_PLACEHOLDER_PATTERN = re.compile(r"<!--##([A-Z_]+)##-->|##([A-Z_]+)##")
+
+# Number of characters encoded at once when writing, so that long values are never copied whole.
+_WRITE_CHUNK_N_CHARS = 1 << 16
+
+
+class Template:
+    """
+    Text with placeholders, compiled once into literal segments and slots between them.
+    Rendering substitutes each slot in a single pass: substituted values are never searched for placeholders, so they
+    may contain anything, and large values are not copied when the template is written to a file.
+    """
+
+    def __init__(self, text):
+        self.segments = []
+        self.slots = []
+        position = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(text):
+            self.segments.append(text[position:match.start()])
+            self.slots.append(match.group(1) or match.group(2))
+            position = match.end()
+        self.segments.append(text[position:])
+
+    def iter_chunks(self, values):
+        """
+        :param values: dict giving the value of each slot, either a string or a list of strings to concatenate.
+        :return: iterator over the strings making the rendered text.
+        """
+        missing_slots = set(self.slots).difference(values)
+        if missing_slots:
+            raise RuntimeError(f"No value given for template slots: {', '.join(sorted(missing_slots))}.")
+        for segment, slot in zip(self.segments, self.slots):
+            yield segment
+            value = values[slot]
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+        yield self.segments[-1]
+
+    def render(self, values):
+        """
+        :param values: see `Template.iter_chunks`.
+        :return: the rendered text.
+        """
+        return "".join(self.iter_chunks(values))
+
+    def write(self, f, values):
+        """
+        Writes the rendered text, encoded in UTF-8, chunk by chunk.
+        :param f: file opened in binary mode.
+        :param values: see `Template.iter_chunks`.
+        :return: (number of bytes written, SHA-256 hex digest of the written bytes).
+        """
+        n_bytes = 0
+        hasher = hashlib.sha256()
+        for chunk in self.iter_chunks(values):
+            for start in range(0, len(chunk), _WRITE_CHUNK_N_CHARS):
+                data = chunk[start:start + _WRITE_CHUNK_N_CHARS].encode("utf8")
+                f.write(data)
+                hasher.update(data)
+                n_bytes += len(data)
+        return n_bytes, hasher.hexdigest()
@@ -0,0 +1,117 @@
+from .app import load_build_manifest, load_parameters_file, load_web_app_resources, process_parameters
+from .cli import add_watch_arguments
+
+import argparse
+import os
+import sys
+import time
+import traceback
+
+
+def take_snapshot(file_paths):
+    """
+    :param file_paths: list of file paths.
+    :return: dict giving the modification time and size of each file, or None for missing files.
+    """
+    snapshot = {}
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+            snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            snapshot[file_path] = None
+    return snapshot
+
+
+def wait_for_changes(snapshot, poll_interval, debounce_delay):
+    """
+    Polls files until some of them change, then until none of them changed for debounce_delay seconds, so that a burst
+    of saves triggers a single build.
+    :param snapshot: snapshot of the watched files, see `take_snapshot`.
+    :param poll_interval: delay between two polls, in seconds.
+    :param debounce_delay: in seconds.
+    :return: the new snapshot, and the list of changed files.
+    """
+    new_snapshot = snapshot
+    while new_snapshot == snapshot:
+        time.sleep(poll_interval)
+        new_snapshot = take_snapshot(snapshot)
+
+    last_change_time = time.monotonic()
+    while time.monotonic() - last_change_time < debounce_delay:
+        time.sleep(poll_interval)
+        newer_snapshot = take_snapshot(snapshot)
+        if newer_snapshot != new_snapshot:
+            new_snapshot = newer_snapshot
+            last_change_time = time.monotonic()
+
+    return new_snapshot, [file_path for file_path in snapshot if new_snapshot[file_path] != snapshot[file_path]]
+
+
+def watch(parameters_file_path, poll_interval=0.1, debounce_delay=0.3, max_builds=None):
+    """
+    Builds a play, then rebuilds it whenever its parameters file or one of its transcriptions changes.
+    Parameters, templates, the Brython runtime and the build manifest stay in memory between builds, so that a
+    rebuild only parses the changed scenes and only rewrites the outputs whose content changed.
+    A failing build is reported and does not stop watching.
+    :param parameters_file_path:
+    :param poll_interval: delay between two polls of the watched files, in seconds.
+    :param debounce_delay: delay without changes to wait for before rebuilding, in seconds.
+    :param max_builds: number of builds after which watching stops. Never stops if None.
+    :return:
+    """
+    parameters_file_path = str(parameters_file_path)
+    load_web_app_resources()
+    parameters = None
+    build_manifest = None
+    changed_file_paths = [parameters_file_path]
+    watched_file_paths = [parameters_file_path]
+    n_builds = 0
+    while True:
+        start_time = time.perf_counter()
+        try:
+            if parameters is None or parameters_file_path in changed_file_paths:
+                parameters = None
+                parameters = load_parameters_file(parameters_file_path)
+                # The previous manifest is kept, unless the parameters give it another file.
+                manifest_parameters = parameters["output"].get("build_manifest")
+                manifest_file_path = None if manifest_parameters is None else manifest_parameters["file_path"]
+                if build_manifest is None or build_manifest.file_path != manifest_file_path:
+                    build_manifest = load_build_manifest(parameters)
+                watched_file_paths = [parameters_file_path] + [
+                    str(scene["file_path"]) for scene in parameters["scenes"]]
+            snapshot = take_snapshot(watched_file_paths)
+            process_parameters(parameters, build_manifest)
+            print(f"Built {parameters_file_path} in {(time.perf_counter() - start_time) * 1000:.0f} ms.", flush=True)
+        except Exception:
+            snapshot = take_snapshot(watched_file_paths)
+            print(f"Build of {parameters_file_path} failed:\n{traceback.format_exc()}", file=sys.stderr, flush=True)
+
+        n_builds += 1
+        if max_builds is not None and n_builds >= max_builds:
+            return
+        snapshot, changed_file_paths = wait_for_changes(snapshot, poll_interval, debounce_delay)
+        print(f"Changed: {', '.join(changed_file_paths)}", flush=True)
+
+
+def run(args):
+    """
+    :param args: parsed arguments, see `add_watch_arguments`.
+    :return: exit status.
+    """
+    try:
+        watch(args.parameters, poll_interval=args.poll_interval, debounce_delay=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Builds a play, then rebuilds it whenever its parameters file or its transcriptions change.")
+    add_watch_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
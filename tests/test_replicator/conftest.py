@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_folder(tmp_path, monkeypatch):
+    """
+    Keeps the persistent caches written by tests out of the user cache folder.
+    """
+    cache_folder_path = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_folder_path))
+    return cache_folder_path
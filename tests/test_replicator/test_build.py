@@ -0,0 +1,94 @@
+from replicreator.app import load_parameters_file, process_parameters, write_external_runtime
+from replicreator.util.build_manifest import BuildManifest
+
+import builtins
+from collections import Counter
+from pathlib import Path
+import shutil
+import sqlite3
+
+import pytest
+
+
+DEMOS_FOLDER_PATH = Path(__file__).parents[2] / "demos"
+
+
+@pytest.fixture
+def demo_parameters_file_path(tmp_path):
+    shutil.copytree(DEMOS_FOLDER_PATH / "transcriptions", tmp_path / "transcriptions")
+    shutil.copy(DEMOS_FOLDER_PATH / "replicreator_parameters.yaml", tmp_path)
+    return tmp_path / "replicreator_parameters.yaml"
+
+
+@pytest.fixture
+def opened_transcriptions(monkeypatch):
+    """
+    Counts how many times each transcription file is opened.
+    """
+    counter = Counter()
+    builtin_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        if isinstance(file, (str, Path)) and Path(file).parent.name == "transcriptions":
+            counter[Path(file).name] += 1
+        return builtin_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    return counter
+
+
+@pytest.mark.parametrize("transcriptions_format, n_rebuild_opens", [("raw", 1), ("parsed", 0)])
+def test_transcriptions_are_read_once(demo_parameters_file_path, opened_transcriptions, transcriptions_format,
+                                      n_rebuild_opens):
+    parameters = load_parameters_file(demo_parameters_file_path)
+    parameters["output"]["web_app"]["transcriptions_format"] = transcriptions_format
+
+    process_parameters(parameters)
+    assert opened_transcriptions == {"scene_I_1.txt": 1, "scene_I_2.txt": 1}
+
+    # Only texts embedded in the web app are read again if transcriptions did not change.
+    opened_transcriptions.clear()
+    process_parameters(parameters)
+    assert sum(opened_transcriptions.values()) == 2 * n_rebuild_opens
+
+    # A changed transcription is read again, once.
+    with open(demo_parameters_file_path.parent / "transcriptions/scene_I_1.txt", "a", encoding="utf8") as f:
+        f.write("\nConnor\nNouvelle réplique.\n")
+    opened_transcriptions.clear()
+    process_parameters(parameters)
+    assert opened_transcriptions["scene_I_1.txt"] == 1
+    assert opened_transcriptions["scene_I_2.txt"] == n_rebuild_opens
+
+
+def test_statistics_database_is_only_exported_again_if_transcriptions_changed(demo_parameters_file_path):
+    parameters = load_parameters_file(demo_parameters_file_path)
+    database_file_path = demo_parameters_file_path.parent / "statistics.sqlite"
+    process_parameters(parameters)
+    modification_time = database_file_path.stat().st_mtime_ns
+
+    process_parameters(parameters)
+    assert database_file_path.stat().st_mtime_ns == modification_time
+
+    with open(demo_parameters_file_path.parent / "transcriptions/scene_I_1.txt", "a", encoding="utf8") as f:
+        f.write("\nConnor\nNouvelle réplique.\n")
+    process_parameters(parameters)
+    with sqlite3.connect(database_file_path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM lines WHERE text = 'Nouvelle réplique.'").fetchone() == (1,)
+
+    database_file_path.unlink()
+    process_parameters(parameters)
+    assert database_file_path.exists()
+
+
+def test_external_runtime_is_written_once_without_temporary_files(tmp_path):
+    runtime_file_path = tmp_path / "runtime" / "brython.0123456789abcdef.js"
+    build_manifest = BuildManifest()
+    write_external_runtime(build_manifest, runtime_file_path, "runtime", optimize=True)
+    assert runtime_file_path.read_text(encoding="utf8") == "runtime"
+    assert all(not path.name.endswith(".tmp") for path in runtime_file_path.parent.iterdir())
+    assert Path(f"{runtime_file_path}.gz").exists()
+
+    # Files written by another build are kept as is.
+    runtime_file_path.write_text("written by another build", encoding="utf8")
+    write_external_runtime(BuildManifest(), runtime_file_path, "runtime", optimize=True)
+    assert runtime_file_path.read_text(encoding="utf8") == "written by another build"
@@ -0,0 +1,53 @@
+from replicreator.util.build_manifest import BuildManifest, hash_text
+
+
+def write_tmp_file(file_path, content):
+    tmp_file_path = f"{file_path}.tmp"
+    with open(tmp_file_path, "w", encoding="utf8") as f:
+        f.write(content)
+    return tmp_file_path
+
+
+def test_replace_output_moves_new_content(tmp_path):
+    file_path = tmp_path / "index.html"
+    build_manifest = BuildManifest()
+    assert build_manifest.replace_output(file_path, write_tmp_file(file_path, "v1"), hash_text("v1"))
+    assert file_path.read_text(encoding="utf8") == "v1"
+    assert build_manifest.is_output_up_to_date(file_path, hash_text("v1"))
+    assert list(tmp_path.iterdir()) == [file_path]
+
+    assert build_manifest.replace_output(file_path, write_tmp_file(file_path, "v2"), hash_text("v2"))
+    assert file_path.read_text(encoding="utf8") == "v2"
+    assert build_manifest.is_output_up_to_date(file_path, hash_text("v2"))
+    assert not build_manifest.is_output_up_to_date(file_path, hash_text("v1"))
+    assert list(tmp_path.iterdir()) == [file_path]
+
+
+def test_replace_output_keeps_up_to_date_output(tmp_path):
+    file_path = tmp_path / "index.html"
+    build_manifest = BuildManifest()
+    build_manifest.replace_output(file_path, write_tmp_file(file_path, "v1"), "hash")
+    modification_time = file_path.stat().st_mtime_ns
+
+    assert not build_manifest.replace_output(file_path, write_tmp_file(file_path, "v1"), "hash")
+    assert file_path.stat().st_mtime_ns == modification_time
+    assert list(tmp_path.iterdir()) == [file_path]
+
+
+def test_replace_output_restores_deleted_output(tmp_path):
+    file_path = tmp_path / "index.html"
+    build_manifest = BuildManifest()
+    build_manifest.replace_output(file_path, write_tmp_file(file_path, "v1"), "hash")
+    file_path.unlink()
+
+    assert build_manifest.replace_output(file_path, write_tmp_file(file_path, "v1"), "hash")
+    assert file_path.read_text(encoding="utf8") == "v1"
+
+
+def test_outputs_are_kept_across_saves(tmp_path):
+    file_path = tmp_path / "index.html"
+    build_manifest = BuildManifest(tmp_path / "manifest.json")
+    build_manifest.write_output(file_path, "v1")
+    build_manifest.save()
+
+    assert BuildManifest(tmp_path / "manifest.json").is_output_up_to_date(file_path, hash_text("v1"))
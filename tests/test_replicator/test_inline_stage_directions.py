@@ -0,0 +1,50 @@
+from replicreator.util.inline_stage_directions import remove_inline_stage_directions, split_inline_stage_directions
+
+import pytest
+
+
+@pytest.mark.parametrize("line, expected_spans", [
+    ("", []),
+    ("Bonjour.", [("Bonjour.", False)]),
+    ("(Il entre.) Bonjour.", [("(Il entre.)", True), (" Bonjour.", False)]),
+    ("Bonjour (Il sort.)", [("Bonjour ", False), ("(Il sort.)", True)]),
+    # An unclosed parenthesis starts a stage direction running to the end of the line.
+    ("Bonjour (Il sort.", [("Bonjour ", False), ("(Il sort.", True)]),
+    ("(", [("(", True)]),
+    # A closing parenthesis without an opening one is text.
+    ("Bonjour) toi.", [("Bonjour) toi.", False)]),
+    (")", [(")", False)]),
+    # A stage direction ends with the first following closing parenthesis, even if it contains another opening one.
+    ("A (b (c) d) e", [("A ", False), ("(b (c)", True), (" d) e", False)]),
+    ("(a)(b) c", [("(a)", True), ("(b)", True), (" c", False)]),
+    ("()", [("()", True)]),
+])
+def test_split_inline_stage_directions(line, expected_spans):
+    assert split_inline_stage_directions(line) == expected_spans
+
+
+@pytest.mark.parametrize("line", [
+    "", "(", ")", ")(", "((", "))", "()()", "a(b", "a)b(c", "(a (b) c) d", "Bonjour (Il sort.) Au revoir (Il revient.",
+])
+def test_spans_give_back_the_line(line):
+    spans = split_inline_stage_directions(line)
+    assert "".join(text for text, _ in spans) == line
+    assert all(text for text, _ in spans)
+    # Text spans are never adjacent, and every stage direction starts with an opening parenthesis.
+    for (_, previous_is_stage_direction), (_, is_stage_direction) in zip(spans, spans[1:]):
+        assert previous_is_stage_direction or is_stage_direction
+    assert all(text.startswith("(") for text, is_stage_direction in spans if is_stage_direction)
+
+
+@pytest.mark.parametrize("line, expected_line", [
+    ("", ""),
+    ("Bonjour.", "Bonjour."),
+    ("(Il entre.) Bonjour.", " Bonjour."),
+    ("Bonjour (Il sort.", "Bonjour "),
+    ("Bonjour) toi.", "Bonjour) toi."),
+    ("A (b (c) d) e", "A  d) e"),
+    ("(a)(b) c", " c"),
+    ("Connor (à Nem), Nemesis", "Connor , Nemesis"),
+])
+def test_remove_inline_stage_directions(line, expected_line):
+    assert remove_inline_stage_directions(line) == expected_line
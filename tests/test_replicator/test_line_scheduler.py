@@ -0,0 +1,89 @@
+from replicreator.util import line_scheduler
+from replicreator.util.line_scheduler import LineScheduler, bisect_left
+
+import bisect
+
+import pytest
+
+
+def choose_by_scan(scores, excluded_index):
+    """
+    Former implementation, scanning every line on each choice.
+    """
+    worst_score = (1000000000, 1000000000, 1000000000)
+    worst_indexes = []
+    for index, score in enumerate(scores):
+        if index == excluded_index:
+            continue
+        if score < worst_score:
+            worst_score = score
+            worst_indexes = []
+        if score == worst_score:
+            worst_indexes.append(index)
+    if not worst_indexes:
+        return None
+    return worst_indexes[line_scheduler.randint(len(worst_indexes))]
+
+
+def rehearse(choose, update, n_prompts, seed):
+    """
+    Plays a random rehearsal: each chosen line gets a result picked by a generator independent of the scheduler's.
+    :return: list of chosen line indexes.
+    """
+    line_scheduler.seed = seed
+    results_seed = seed
+    last_index = None
+    chosen_indexes = []
+    for _ in range(n_prompts):
+        index = choose(last_index)
+        chosen_indexes.append(index)
+        if index is None:
+            break
+        results_seed = (1103515245 * results_seed + 12345) % 2**31
+        update(index, results_seed % 3)
+        last_index = index
+    return chosen_indexes
+
+
+@pytest.mark.parametrize("n_lines", [1, 2, 3, 10, 57])
+@pytest.mark.parametrize("seed", [0, 1, 123456789])
+def test_choices_match_linear_scan(n_lines, seed):
+    initial_scores = [(index % 2, index % 3, 0) for index in range(n_lines)]
+
+    scores = list(initial_scores)
+
+    def update_scores(index, result):
+        score = list(scores[index])
+        score[result] += 1
+        scores[index] = tuple(score)
+
+    expected_indexes = rehearse(lambda excluded_index: choose_by_scan(scores, excluded_index), update_scores,
+                                2 * n_lines + 20, seed)
+
+    scheduler = LineScheduler(initial_scores)
+
+    def update_scheduler(index, result):
+        score = list(scheduler.scores[index])
+        score[result] += 1
+        scheduler.update(index, tuple(score))
+
+    assert rehearse(scheduler.choose, update_scheduler, 2 * n_lines + 20, seed) == expected_indexes
+    assert scheduler.scores == scores
+    assert scheduler.sorted_scores == sorted(set(scores))
+    for score, bucket in scheduler.buckets.items():
+        assert bucket == [index for index, line_score in enumerate(scores) if line_score == score]
+
+
+def test_choose_without_candidate():
+    assert LineScheduler([]).choose(None) is None
+    assert LineScheduler([(0, 0, 0)]).choose(0) is None
+    assert LineScheduler([(0, 0, 0)]).choose(None) == 0
+
+
+@pytest.mark.parametrize("sorted_list", [[], [1], [1, 1], [1, 3, 3, 5], [(0, 1, 0), (0, 1, 2), (1, 0, 0)]])
+def test_bisect_left_matches_bisect_module(sorted_list):
+    values = sorted_list + [0, 2, 4, 6, (0, 0, 0), (0, 1, 1), (2, 0, 0)]
+    for value in values:
+        if sorted_list and type(value) is not type(sorted_list[0]):
+            continue
+        assert bisect_left(sorted_list, value) == bisect.bisect_left(sorted_list, value)
@@ -0,0 +1,57 @@
+from replicreator.util.minification import minify_css, minify_html_styles, minify_js, minify_python
+
+import pytest
+
+
+@pytest.mark.parametrize("script, expected_script", [
+    ("  var a = 1;  \n\n    // comment\n  f(a);\n", "var a = 1;\nf(a);"),
+    # Lines of template literals are kept as is, even if they look like comments or blank lines.
+    ("var t = `a  \n  // b\n\n  c`;\n  f(t);", "var t = `a  \n  // b\n\n  c`;\nf(t);"),
+    ("f(`${x}`,\n    `y`);", "f(`${x}`,\n`y`);"),
+    # Backticks in strings, comments and regular expressions do not start template literals.
+    ("var s = \"`\";\n  // `\n  var r = /`/;\n  g(`a\n  b`);", "var s = \"`\";\nvar r = /`/;\ng(`a\n  b`);"),
+    ("var c = '//';\n  var d = '\\'`';\n  h();", "var c = '//';\nvar d = '\\'`';\nh();"),
+    ("var r = /[/`]\\//g;\n  i();", "var r = /[/`]\\//g;\ni();"),
+    ("var q = a / b / `c\n  d`;", "var q = a / b / `c\n  d`;"),
+    # Strings continued with a backslash are kept as is.
+    ("var s = \"a\\\n  b  \\\n  c\";\n  j();", "var s = \"a\\\n  b  \\\n  c\";\nj();"),
+    # Multi-line comments are kept, even with lines looking like full-line comments.
+    ("/* a\n  // b */\n  k();", "/* a\n// b */\nk();"),
+    ("/* ` */\n  var t = `x\n  y`;", "/* ` */\nvar t = `x\n  y`;"),
+])
+def test_minify_js(script, expected_script):
+    assert minify_js(script) == expected_script
+
+
+@pytest.mark.parametrize("style, expected_style", [
+    ("body {\n  color: red;\n  margin : 0 ;\n}\n", "body{color:red;margin :0}"),
+    ("/* comment */ a > b , c { x: y }", "a>b,c{x:y}"),
+    # Whitespace before ":" separates a descendant pseudo-class from its ancestor.
+    ("div :first-child { color: red; }", "div :first-child{color:red}"),
+    ("a:hover,\ndiv  :first-child{}", "a:hover,div :first-child{}"),
+    # Strings are left untouched.
+    ("a::before { content: \"x  ;}  /* y */\"; }", "a::before{content:\"x  ;}  /* y */\"}"),
+    ("a::after { content: '\\'  b'; }", "a::after{content:'\\'  b'}"),
+])
+def test_minify_css(style, expected_style):
+    assert minify_css(style) == expected_style
+
+
+def test_minify_html_styles():
+    page = "<style>\n  a { color: red; }\n</style>\n<div>  text  </div>\n<style>b {}</style>"
+    assert minify_html_styles(page) == "<style>a{color:red}</style>\n<div>  text  </div>\n<style>b{}</style>"
+
+
+@pytest.mark.parametrize("script, expected_script", [
+    ("# comment\nx = 1  # comment\n\n\ny = 2\n", "x = 1\ny = 2"),
+    # Multi-line strings are left untouched, even with blank lines or "#".
+    ('s = """a\n\n# b\n"""  # c\n', 's = """a\n\n# b\n"""'),
+    ("t = '# not a comment'\n", "t = '# not a comment'"),
+    # Line continuations and brackets spanning several lines are kept.
+    ("z = 1 + \\\n    2\nw = [\n    1,  # one\n\n    2,\n]\n", "z = 1 + \\\n    2\nw = [\n    1,\n    2,\n]"),
+    ("def f():\n    # comment\n    return 1\n", "def f():\n    return 1"),
+])
+def test_minify_python(script, expected_script):
+    minified_script = minify_python(script)
+    assert minified_script == expected_script
+    compile(minified_script, "minified", "exec")
@@ -0,0 +1,66 @@
+from replicreator.util import parameters_loading
+from replicreator.util.parameters_loading import get_cache_folder_path, load_parameters_yaml
+
+from pathlib import Path
+
+
+SCHEMA = {"type": "dict", "schema": {
+    "name": {"type": "string"},
+    "files": {"type": "list", "schema": {"type": "dict", "schema": {
+        "file_path": {"type": "path", "coerce": "join_base"},
+    }}},
+    "options": {"type": "dict", "schema": {
+        "enabled": {"type": "boolean", "default": False},
+    }},
+}}
+
+
+def write_parameters(tmp_path, name):
+    parameters_file_path = tmp_path / "parameters.yaml"
+    parameters_file_path.write_text(
+        f"name: {name}\nfiles:\n  - file_path: a.txt\n  - file_path: b/c.txt\noptions: {{}}\n", encoding="utf8")
+    return parameters_file_path
+
+
+def test_load_parameters_yaml_validates_parameters(tmp_path):
+    parameters = load_parameters_yaml(str(write_parameters(tmp_path, "play")), SCHEMA)
+    assert parameters == {
+        "name": "play",
+        "files": [{"file_path": tmp_path / "a.txt"}, {"file_path": tmp_path / "b/c.txt"}],
+        "options": {"enabled": False},
+    }
+
+
+def test_validated_parameters_are_cached_on_disk(tmp_path):
+    parameters_file_path = str(write_parameters(tmp_path, "play"))
+    parameters = load_parameters_yaml(parameters_file_path, SCHEMA)
+    assert len(list(get_cache_folder_path().iterdir())) == 1
+
+    # As if loaded by another process.
+    parameters_loading._validated_parameters_cache.clear()
+    cached_parameters = load_parameters_yaml(parameters_file_path, SCHEMA)
+    assert cached_parameters == parameters
+    assert isinstance(cached_parameters["files"][0]["file_path"], Path)
+
+    # Returned parameters are copies.
+    cached_parameters["files"].clear()
+    assert load_parameters_yaml(parameters_file_path, SCHEMA) == parameters
+
+
+def test_changed_parameters_are_validated_again(tmp_path):
+    parameters_file_path = str(write_parameters(tmp_path, "play"))
+    load_parameters_yaml(parameters_file_path, SCHEMA)
+    parameters_loading._validated_parameters_cache.clear()
+    write_parameters(tmp_path, "other play")
+    assert load_parameters_yaml(parameters_file_path, SCHEMA)["name"] == "other play"
+    # The cache file of the parameters file is replaced.
+    assert len(list(get_cache_folder_path().iterdir())) == 1
+
+
+def test_base_path_of_child_validators(tmp_path):
+    # Each call validates with its own base path, including in the nested schemas handled by child validators.
+    for folder_name in ["first", "second"]:
+        folder_path = tmp_path / folder_name
+        folder_path.mkdir()
+        parameters = load_parameters_yaml(str(write_parameters(folder_path, "play")), SCHEMA)
+        assert parameters["files"][1]["file_path"] == folder_path / "b/c.txt"
@@ -0,0 +1,29 @@
+from replicreator.serve import accepts_gzip
+
+import pytest
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, False),
+    ("", False),
+    ("gzip", True),
+    ("deflate, GZIP", True),
+    ("br;q=1.0, gzip;q=0.8", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("gzip;q=0.000", False),
+    ("gzip;q=", False),
+    # Malformed or out of range quality values make the coding not acceptable, instead of failing the request.
+    ("gzip;q=abc", False),
+    ("gzip;q=nan", False),
+    ("gzip;q=2", False),
+    ("identity", False),
+    # An explicit gzip coding takes precedence over "*", whatever their order.
+    ("*;q=1, gzip;q=0", False),
+    ("gzip;q=0, *;q=1", False),
+    ("*;q=0, gzip", True),
+    ("gzip, *;q=0", True),
+    ("identity, *;q=0.5", True),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) == expected
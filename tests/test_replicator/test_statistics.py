@@ -0,0 +1,107 @@
+from replicreator.app import (compute_statistics, create_label2main, load_parameters_file, load_transcription,
+                              save_statistics)
+from replicreator.util.inline_stage_directions import remove_inline_stage_directions
+from replicreator.util.statistics_matrix import StatisticsMatrix, count_words
+
+from pathlib import Path
+import sys
+
+import pytest
+
+
+DEMOS_FOLDER_PATH = Path(__file__).parents[2] / "demos"
+
+# Statistics of the demo play, as written before statistics were computed into a matrix.
+DEMO_STATISTICS = {
+    "lines": [
+        "scene name,Connor,Nemesis,Friska,TOTAL",
+        "Scène I-1 : Un nouveau monde,3,2,0,5",
+        "Scène I-2 : Une faim inattendue,7,4,4,15",
+        "TOTAL,10,6,4,20",
+    ],
+    "words": [
+        "scene name,Connor,Nemesis,Friska,TOTAL",
+        "Scène I-1 : Un nouveau monde,4,4,0,8",
+        "Scène I-2 : Une faim inattendue,16,0,0,16",
+        "TOTAL,20,4,0,24",
+    ],
+    "alphanum_chars": [
+        "scene name,Connor,Nemesis,Friska,TOTAL",
+        "Scène I-1 : Un nouveau monde,30,22,0,52",
+        "Scène I-2 : Une faim inattendue,90,0,0,90",
+        "TOTAL,120,22,0,142",
+    ],
+}
+
+
+def count_words_with_isalnum(text):
+    """
+    Former implementation, cleaning text one character at a time.
+    """
+    clean_text = "".join([c if c.isalnum() else " " for c in text])
+    return len(clean_text.split()), sum(c.isalnum() for c in clean_text)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "Bonjour !",
+    "Qu'est-ce que c'est ?",
+    "snake_case, l'été, 42 chats... et 3,14",
+    "Ça va ?\nOui.\n\nEt toi ?",
+    "œuvre Ærø ß İstanbul ǅ ½ ² ٣ 七 한국어 Ελληνικά",
+    "combining é and tab\tseparated words",
+])
+def test_count_words_matches_isalnum(text):
+    assert count_words(text) == count_words_with_isalnum(text)
+
+
+def test_count_words_matches_isalnum_for_every_character():
+    # Every character is surrounded by separators, so that each one is tested both as a word and as a separator.
+    characters = [chr(code_point) for code_point in range(sys.maxunicode + 1)
+                  if not 0xD800 <= code_point <= 0xDFFF]
+    for start in range(0, len(characters), 4096):
+        text = " ".join(characters[start:start + 4096])
+        assert count_words(text) == count_words_with_isalnum(text)
+        text = "a".join(characters[start:start + 4096])
+        assert count_words(text) == count_words_with_isalnum(text)
+
+
+def load_demo(tmp_path):
+    parameters = load_parameters_file(DEMOS_FOLDER_PATH / "replicreator_parameters.yaml")
+    parameters["output"]["statistics"]["base_file_path"] = tmp_path / "statistics"
+    label2main = create_label2main(parameters)
+    stage_directions_labels = set(parameters["stage_directions"]["labels"])
+    transcriptions = [load_transcription(scene["file_path"], label2main, stage_directions_labels)
+                      for scene in parameters["scenes"]]
+    main_character_labels = [character["labels"][0] for character in parameters["characters"]]
+    return parameters, transcriptions, main_character_labels
+
+
+def test_compute_statistics_matches_line_by_line_count(tmp_path):
+    parameters, transcriptions, main_character_labels = load_demo(tmp_path)
+    statistics = compute_statistics(parameters, transcriptions, main_character_labels)
+
+    expected_statistics = StatisticsMatrix(len(transcriptions), main_character_labels)
+    for scene_index, transcription in enumerate(transcriptions):
+        for block in transcription["blocks"]:
+            for line in block["lines"]:
+                n_words, n_alphanum_chars = count_words_with_isalnum(remove_inline_stage_directions(line))
+                for main_character in block["main_characters"]:
+                    if main_character is None:
+                        continue
+                    character_index = main_character_labels.index(main_character)
+                    for metric_index, value in enumerate([1, n_words, n_alphanum_chars]):
+                        expected_statistics.values[
+                            expected_statistics.index(scene_index, character_index, metric_index)] += value
+    assert statistics.values == expected_statistics.values
+
+
+def test_save_statistics_writes_demo_statistics(tmp_path):
+    parameters, transcriptions, main_character_labels = load_demo(tmp_path)
+    statistics = compute_statistics(parameters, transcriptions, main_character_labels)
+    save_statistics(parameters, statistics)
+
+    for metric, expected_rows in DEMO_STATISTICS.items():
+        with open(tmp_path / f"statistics_{metric}.csv", "r", encoding="utf8", newline="") as f:
+            assert f.read() == "".join(f"{row}\r\n" for row in expected_rows)
@@ -0,0 +1,86 @@
+from replicreator.app import write_rendered_web_app_file
+from replicreator.util.build_manifest import BuildManifest, hash_bytes
+from replicreator.util.templates import Template
+
+import io
+import warnings
+
+import pytest
+
+
+def test_template_parses_both_placeholder_forms():
+    template = Template("<p>##NAME##</p><!--##BODY##-->##NAME##")
+    assert template.segments == ["<p>", "</p>", "", ""]
+    assert template.slots == ["NAME", "BODY", "NAME"]
+
+
+def test_template_without_placeholders():
+    template = Template("plain text, # not ## a placeholder")
+    assert template.segments == ["plain text, # not ## a placeholder"]
+    assert template.slots == []
+    assert template.render({}) == "plain text, # not ## a placeholder"
+
+
+def test_render_substitutes_values_once():
+    template = Template("<title>##PLAY_NAME##</title><!--##SCRIPT##-->")
+    # Values are never searched for placeholders.
+    assert template.render({"PLAY_NAME": "##SCRIPT##", "SCRIPT": "<!--##PLAY_NAME##-->"}) == \
+        "<title>##SCRIPT##</title><!--##PLAY_NAME##-->"
+
+
+def test_render_joins_list_values():
+    template = Template("[##ITEMS##]")
+    assert template.render({"ITEMS": ["a", "", "b"]}) == "[ab]"
+    assert template.render({"ITEMS": []}) == "[]"
+
+
+def test_missing_slot_raises():
+    template = Template("##A## ##B## ##C##")
+    with pytest.raises(RuntimeError, match="B, C"):
+        template.render({"A": "a"})
+
+
+def test_write_returns_byte_count_and_hash():
+    template = Template("é ##VALUE## ##LIST##")
+    # Long values are encoded by chunks, which must not split characters.
+    values = {"VALUE": "ü" * 100000, "LIST": ["😀", "x" * 70000]}
+    f = io.BytesIO()
+    n_bytes, content_hash = template.write(f, values)
+    expected_content = template.render(values).encode("utf8")
+    assert f.getvalue() == expected_content
+    assert n_bytes == len(expected_content)
+    assert content_hash == hash_bytes(expected_content)
+
+
+def test_write_rendered_web_app_file_writes_file_and_records_it(tmp_path):
+    file_path = tmp_path / "index.html"
+    build_manifest = BuildManifest()
+    content_hash = write_rendered_web_app_file(build_manifest, file_path, Template("<p>##TEXT##</p>"),
+                                               {"TEXT": "Bonjour"}, optimize=False)
+    assert file_path.read_text(encoding="utf8") == "<p>Bonjour</p>"
+    assert content_hash == hash_bytes(b"<p>Bonjour</p>")
+    assert build_manifest.is_output_up_to_date(file_path, content_hash)
+    assert list(tmp_path.iterdir()) == [file_path]
+
+
+def test_size_budget_failure_removes_temporary_file(tmp_path):
+    file_path = tmp_path / "index.html"
+    file_path.write_text("previous", encoding="utf8")
+    build_manifest = BuildManifest()
+    with pytest.raises(RuntimeError, match="size budget"):
+        write_rendered_web_app_file(build_manifest, file_path, Template("##TEXT##"), {"TEXT": "x" * 100},
+                                    optimize=False, size_budget={"max_bytes": 10, "action": "fail"})
+    assert file_path.read_text(encoding="utf8") == "previous"
+    assert list(tmp_path.iterdir()) == [file_path]
+    assert str(file_path) not in build_manifest.outputs
+
+
+def test_size_budget_warning_writes_file(tmp_path):
+    file_path = tmp_path / "index.html"
+    with warnings.catch_warnings(record=True) as caught_warnings:
+        warnings.simplefilter("always")
+        write_rendered_web_app_file(BuildManifest(), file_path, Template("##TEXT##"), {"TEXT": "x" * 100},
+                                    optimize=False, size_budget={"max_bytes": 10, "action": "warn"})
+    assert len(caught_warnings) == 1
+    assert file_path.read_text(encoding="utf8") == "x" * 100
+    assert list(tmp_path.iterdir()) == [file_path]